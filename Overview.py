@@ -1,6 +1,9 @@
-import pandas as pd
 import streamlit as st
 from streamlit.components.v1 import html
+from ssls.memory import check_memory
+from ssls.metrics import span
+from ssls.reports import load_report
+from ssls.warmup import warm_process
 
 
 
@@ -12,18 +15,12 @@ st.set_page_config(
     layout="wide"
 )
 
+# start loading shared data/models for this worker in the background (see ssls/warmup.py)
+warm_process()
+
 """
 # Boston Airbnb Pricing Analysis by Team Strong-Side-Left-Side
 """
-@st.cache_data
-def load_csv(path):
-    df = pd.read_csv(path)
-    return df
-
-# load all data first, some is needed for sidebar
-boston_NBH = load_csv("inputs/boston_NBH.csv")
-boston_tract = load_csv("inputs/boston_tract.csv")
-
 #############################################
 # start: sidebar
 #############################################
@@ -147,13 +144,13 @@ if page_select == 'Project Overview':
 
 
 elif page_select == 'EDA & Methodology':
-    with open('inputs/EDA_Methodology.html', 'r', encoding='utf-8') as f:
-        html_file = f.read()
-    # Display HTML file
-    html(html_file, height = 9300)
+    # slimmed once per process, plots are served as static files (see ssls/reports.py)
+    with span("overview.report"):
+        html(load_report('inputs/EDA_Methodology.html'), height = 9300)
 else:
-    with open('inputs/ML_discussion.html', 'r', encoding='utf-8') as f:
-        html_file = f.read()
-    # Display HTML file
-    html(html_file, height = 7800)
+    with span("overview.report"):
+        html(load_report('inputs/ML_discussion.html'), height = 7800)
+
 
+# report worker memory and export metrics, like every page (see ssls/memory.py)
+check_memory("Overview")
@@ -0,0 +1,98 @@
+"""
+Import-time benchmark for each dashboard page.
+
+Streamlit re-executes a page script on every interaction, and a fresh worker
+pays every module-level import of the first page it serves. This runs the
+top-level imports of Overview.py and each script in pages/ in a clean
+interpreter (with `-X importtime`) and reports the median cost per page and
+the slowest packages it pulls in, leaving out what a bare `-c pass`
+interpreter already spends and imports at start-up.
+
+    python -m benchmarks.import_time [--repeat 5] [--json out.json]
+"""
+import argparse
+import ast
+import glob
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+PAGES = ["Overview.py"] + sorted(glob.glob("pages/*.py"))
+
+
+def page_imports(path):
+    """The page's module-level import statements as source code."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body
+                     if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def _run(code):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, proc.stderr
+
+
+def _package_times(importtime_log):
+    # cumulative microseconds of each top-level package (lines are "self | cumulative | name")
+    cumulative = {}
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum, name = line[len("import time:"):].split("|")
+        # nested imports are indented past the single separator space
+        name = name[1:]
+        if not name.startswith(" ") and "." not in name:
+            cumulative[name] = max(cumulative.get(name, 0), int(cum))
+    return cumulative
+
+
+def _top_packages(importtime_log, baseline_log, n=5):
+    # interpreter start-up (site, encodings, io, ...) is in every log, only keep what the page adds
+    startup = _package_times(baseline_log)
+    cumulative = {name: us for name, us in _package_times(importtime_log).items() if name not in startup}
+    top = sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:n]
+    return [{"module": name, "ms": round(us / 1000, 1)} for name, us in top]
+
+
+def benchmark(pages=PAGES, repeat=5):
+    baseline_runs = [_run("pass") for _ in range(repeat)]
+    baseline = statistics.median(t for t, _ in baseline_runs)
+    results = []
+    for page in pages:
+        code = page_imports(page)
+        try:
+            runs = [_run(code) for _ in range(repeat)]
+        except subprocess.CalledProcessError as e:
+            results.append({"page": page, "error": e.stderr.strip().splitlines()[-1]})
+            continue
+        seconds = statistics.median(t for t, _ in runs) - baseline
+        results.append({"page": page, "import_ms": round(seconds * 1000, 1),
+                        "slowest": _top_packages(runs[-1][1], baseline_runs[-1][1])})
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure per-page import time.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = benchmark(repeat=args.repeat)
+    for r in results:
+        if "error" in r:
+            print(f"{'failed':>11}  {r['page']}  ({r['error']})")
+            continue
+        slowest = ", ".join(f"{m['module']} {m['ms']:.0f}ms" for m in r["slowest"])
+        print(f"{r['import_ms']:8.1f} ms  {r['page']}  ({slowest})")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Concurrent-session load generator for sizing workers.
+
+Simulates N users clicking through the sidebars of Listings Data, Census Info
+and Price Suggestion at the same time. Each session is a streamlit AppTest
+on its own thread, so all sessions in a worker process share the worker's
+caches and memory exactly as they would behind `streamlit run`. Every click
+picks a random option of a random selectbox (and submits the Price
+Suggestion form), waits a random think time, and reruns the page.
+
+    python -m benchmarks.load --sessions 30 --duration 60 [--workers 2] [--json out.json]
+
+Reports latency percentiles and throughput (overall and per page), errors,
+and each worker's resident memory at start, peak and end, so memory growth
+under sustained load is visible.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+from benchmarks.pages import PAGES, TIMEOUT, find_widget, sweep_for
+from ssls.memory import resident_memory_mb
+
+LOAD_PAGES = [p for p in PAGES if any(name in p for name in
+                                      ("Listings_Data", "Census_Info", "Price_Suggestion"))]
+
+# seconds between RSS samples
+SAMPLE_INTERVAL = 0.5
+
+
+def _click(at, page, rng):
+    """Change one random sidebar selectbox of the page (without rerunning)."""
+    sweep = sweep_for(page)
+    present = [find_widget(at.selectbox, labels) for labels in sweep["steps"]]
+    present = [widget for widget in present if widget is not None and widget.options]
+    if not present:
+        return
+    widget = rng.choice(present)
+    widget.select_index(rng.randrange(len(widget.options)))
+    if sweep.get("submit"):
+        button = find_widget(at.button, sweep["submit"])
+        if button is not None:
+            button.click()
+
+
+def run_session(page, deadline, think, seed, results, lock):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    at = AppTest.from_file(os.path.abspath(page), default_timeout=TIMEOUT)
+    first = True
+    while time.monotonic() < deadline:
+        if not first:
+            _click(at, page, rng)
+        start = time.perf_counter()
+        try:
+            at.run()
+            error = at.exception[0].value if at.exception else None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        seconds = time.perf_counter() - start
+        with lock:
+            results.append({"page": page, "ms": seconds * 1000, "first": first, "error": error})
+        first = False
+        time.sleep(rng.uniform(0, 2 * think))
+
+
+def run_worker(sessions, duration, think, seed, first_session=0):
+    """Run `sessions` concurrent sessions in this process for `duration` seconds."""
+    results, lock = [], threading.Lock()
+    rss = [resident_memory_mb()]
+    deadline = time.monotonic() + duration
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(SAMPLE_INTERVAL):
+            rss.append(resident_memory_mb())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    threads = [
+        threading.Thread(target=run_session, daemon=True,
+                         args=(LOAD_PAGES[i % len(LOAD_PAGES)], deadline, think,
+                               seed * 1000 + i, results, lock))
+        for i in range(first_session, first_session + sessions)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+    rss.append(resident_memory_mb())
+
+    return {
+        "pid": os.getpid(),
+        "sessions": sessions,
+        "seconds": elapsed,
+        "rss_start_mb": round(rss[0], 1),
+        "rss_peak_mb": round(max(rss), 1),
+        "rss_end_mb": round(rss[-1], 1),
+        "rss_growth_mb": round(rss[-1] - rss[0], 1),
+        "requests": results,
+    }
+
+
+def _percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {}
+
+    def pct(p):
+        return round(values[min(int(p / 100 * len(values)), len(values) - 1)], 1)
+
+    return {"p50_ms": pct(50), "p90_ms": pct(90), "p99_ms": pct(99), "max_ms": round(values[-1], 1),
+            "mean_ms": round(statistics.fmean(values), 1)}
+
+
+def summarize(workers, duration):
+    """Latency percentiles and throughput (reruns/s), overall and per page, over every worker."""
+    requests = [r for w in workers for r in w["requests"]]
+    # the first run of each session loads the page from scratch, report it apart
+    warm = [r for r in requests if not r["first"] and not r["error"]]
+    summary = {
+        "requests": len(requests),
+        "errors": sum(bool(r["error"]) for r in requests),
+        "throughput_rps": round(len(warm) / duration, 2),
+        "latency": _percentiles([r["ms"] for r in warm]),
+        "first_load": _percentiles([r["ms"] for r in requests if r["first"] and not r["error"]]),
+        "pages": {},
+        "workers": [{k: v for k, v in w.items() if k != "requests"} for w in workers],
+    }
+    for page in LOAD_PAGES:
+        page_warm = [r["ms"] for r in warm if r["page"] == page]
+        if page_warm:
+            summary["pages"][page] = {"requests": len(page_warm),
+                                      "throughput_rps": round(len(page_warm) / duration, 2),
+                                      **_percentiles(page_warm)}
+    return summary
+
+
+def _worker(args):
+    return run_worker(*args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent sessions clicking through the pages.")
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent sessions in total")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes to spread them over")
+    parser.add_argument("--duration", type=float, default=60, help="seconds of load")
+    parser.add_argument("--think", type=float, default=1.0, help="mean seconds between clicks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the summary and every request to this file")
+    args = parser.parse_args(argv)
+
+    per_worker = [args.sessions // args.workers + (i < args.sessions % args.workers)
+                  for i in range(args.workers)]
+    # sessions are numbered across workers so every page gets its share
+    jobs = [(n, args.duration, args.think, args.seed, sum(per_worker[:i]))
+            for i, n in enumerate(per_worker) if n]
+    if len(jobs) == 1:
+        workers = [run_worker(*jobs[0])]
+    else:
+        with multiprocessing.get_context("spawn").Pool(len(jobs)) as pool:
+            workers = pool.map(_worker, jobs)
+
+    summary = summarize(workers, args.duration)
+    lat = summary["latency"]
+    print(f"{summary['requests']} reruns, {summary['errors']} errors, "
+          f"{summary['throughput_rps']} reruns/s")
+    if lat:
+        print(f"latency p50 {lat['p50_ms']} ms, p90 {lat['p90_ms']} ms, "
+              f"p99 {lat['p99_ms']} ms, max {lat['max_ms']} ms")
+    for page, stats in summary["pages"].items():
+        print(f"  {stats['p50_ms']:8.1f} ms p50 {stats['p99_ms']:8.1f} ms p99 "
+              f"{stats['throughput_rps']:6.2f}/s  {page}")
+    for w in summary["workers"]:
+        print(f"worker {w['pid']}: {w['sessions']} sessions, rss {w['rss_start_mb']:.0f} -> "
+              f"{w['rss_end_mb']:.0f} MB (peak {w['rss_peak_mb']:.0f}, growth {w['rss_growth_mb']:+.0f})")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "workers": workers}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
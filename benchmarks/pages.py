@@ -0,0 +1,224 @@
+"""
+Headless benchmark of every page over its sidebar options.
+
+Each page is driven with streamlit's AppTest (no browser, no server) through
+every combination of its selectboxes: zone type x zone x month on the data
+pages, each report on Overview. Every page runs in a fresh process, so its
+peak memory is its own and not whatever an earlier page reached. Every run
+records wall time, resident memory before and after, the process's peak
+memory, and the page sections timed with ssls.metrics.span on the page's
+script thread (the background warm-up's spans are left out), and the whole
+sweep is written as JSON:
+
+    python -m benchmarks.pages [--pages Listings] [--max-options 3] [--json out.json]
+
+Compare against a saved run to catch regressions (exits 1 if a page or
+section median got slower, or peak memory grew, by more than --tolerance):
+
+    python -m benchmarks.pages --baseline baseline.json
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+
+from ssls.memory import resident_memory_mb
+from ssls.metrics import take_spans
+
+PAGES = ["Overview.py"] + sorted(glob.glob("pages/*.py"))
+
+# page file (substring) -> selectbox labels swept in order, and the form button to
+# press before measuring. A tuple of labels means "whichever one the page shows".
+ZONE = ("Neighborhood", "Census Tract")
+SWEEPS = {
+    "Overview": {"steps": ["Select Page"]},
+    "Listings_Data": {"steps": ["Zone Type", ZONE, "Month"]},
+    "Census_Info": {"steps": ["Zone Type", ZONE]},
+    "Spatial_Regression": {"steps": []},
+    "Price_Suggestion": {"steps": ["Zone Type", ZONE, "Month"], "submit": "Suggest Price"},
+}
+
+TIMEOUT = 120
+
+# thread AppTest runs the page script on
+SCRIPT_THREAD = "ScriptRunner.scriptThread"
+
+
+def sweep_for(page):
+    for name, sweep in SWEEPS.items():
+        if name in page:
+            return sweep
+    return {"steps": []}
+
+
+def find_widget(widgets, labels):
+    labels = (labels,) if isinstance(labels, str) else labels
+    for widget in widgets:
+        if widget.label in labels:
+            return widget
+    return None
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KB elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _measure(at, page, choices, submit=None):
+    take_spans()
+    rss_before = resident_memory_mb()
+    if submit:
+        button = find_widget(at.button, submit)
+        if button is not None:
+            button.click()
+    start = time.perf_counter()
+    at.run()
+    seconds = time.perf_counter() - start
+    run = {
+        "page": page,
+        **choices,
+        "wall_ms": round(seconds * 1000, 1),
+        "rss_before_mb": round(rss_before, 1),
+        "rss_mb": round(resident_memory_mb(), 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "sections_ms": {name: round(s * 1000, 1)
+                        for name, s in sorted(take_spans(SCRIPT_THREAD).items())},
+    }
+    if at.exception:
+        run["error"] = at.exception[0].value
+    return run
+
+
+def _sweep(at, page, steps, choices, submit, max_options, runs):
+    if not steps:
+        runs.append(_measure(at, page, choices, submit))
+        return
+
+    widget = find_widget(at.selectbox, steps[0])
+    if widget is None:
+        error = at.exception[0].value if at.exception else f"no selectbox {steps[0]}"
+        runs.append({"page": page, **choices, "error": error})
+        return
+
+    label = widget.label
+    options = widget.options[:max_options] if max_options else widget.options
+    for i, option in enumerate(options):
+        # widgets are rebuilt on every run, so look the selectbox up again
+        find_widget(at.selectbox, label).select_index(i)
+        if len(steps) > 1:
+            # later selectboxes (e.g. the zone list) depend on this one
+            at.run()
+        _sweep(at, page, steps[1:], {**choices, label: option}, submit, max_options, runs)
+
+
+def benchmark_page(page, max_options=None):
+    from streamlit.testing.v1 import AppTest
+
+    sweep = sweep_for(page)
+    at = AppTest.from_file(os.path.abspath(page), default_timeout=TIMEOUT)
+    # first run loads the shared data, measured on its own
+    runs = [dict(_measure(at, page, {}), cold=True)]
+    _sweep(at, page, sweep["steps"], {}, sweep.get("submit"), max_options, runs)
+    return runs
+
+
+def benchmark_page_isolated(page, max_options=None):
+    """benchmark_page in a fresh process (ru_maxrss only ever grows within one)."""
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(benchmark_page, (page, max_options))
+
+
+def _p95(values):
+    return sorted(values)[max(int(round(0.95 * len(values))) - 1, 0)]
+
+
+def summarize(runs):
+    """Per page: warm run count, median/p95 wall time, max peak RSS, median per section."""
+    summary = {}
+    for page in dict.fromkeys(r["page"] for r in runs):
+        page_runs = [r for r in runs if r["page"] == page and "wall_ms" in r and not r.get("cold")]
+        if not page_runs:
+            continue
+        walls = [r["wall_ms"] for r in page_runs]
+        sections = {}
+        for r in page_runs:
+            for name, ms in r["sections_ms"].items():
+                sections.setdefault(name, []).append(ms)
+        summary[page] = {
+            "runs": len(page_runs),
+            "errors": sum("error" in r for r in runs if r["page"] == page),
+            "median_ms": round(statistics.median(walls), 1),
+            "p95_ms": round(_p95(walls), 1),
+            "peak_rss_mb": max(r["peak_rss_mb"] for r in page_runs),
+            "sections_median_ms": {name: round(statistics.median(ms), 1)
+                                   for name, ms in sorted(sections.items())},
+        }
+    return summary
+
+
+def compare(summary, baseline, tolerance=0.2):
+    """Regressions of `summary` against a baseline summary, as readable strings."""
+    regressions = []
+
+    def check(what, now, before):
+        if before and now > before * (1 + tolerance):
+            regressions.append(f"{what}: {before:g} -> {now:g} (+{(now / before - 1) * 100:.0f}%)")
+
+    for page, stats in summary.items():
+        old = baseline.get(page)
+        if old is None:
+            continue
+        check(f"{page} median_ms", stats["median_ms"], old["median_ms"])
+        check(f"{page} peak_rss_mb", stats["peak_rss_mb"], old["peak_rss_mb"])
+        for name, ms in stats["sections_median_ms"].items():
+            check(f"{page} {name}", ms, old["sections_median_ms"].get(name))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every page over its sidebar options.")
+    parser.add_argument("--pages", nargs="*", help="only pages whose path contains one of these")
+    parser.add_argument("--max-options", type=int, help="only the first N options of each selectbox")
+    parser.add_argument("--json", help="write the runs and summary to this file")
+    parser.add_argument("--baseline", help="a previous --json report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown/growth over the baseline (default 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    pages = [p for p in PAGES if not args.pages or any(name in p for name in args.pages)]
+    runs = []
+    for page in pages:
+        page_runs = benchmark_page_isolated(page, args.max_options)
+        runs.extend(page_runs)
+        failed = sum("error" in r for r in page_runs)
+        print(f"{page}: {len(page_runs)} runs" + (f", {failed} failed" if failed else ""))
+
+    summary = summarize(runs)
+    for page, stats in summary.items():
+        sections = ", ".join(f"{name} {ms:.0f}ms" for name, ms in stats["sections_median_ms"].items())
+        print(f"{stats['median_ms']:8.1f} ms median {stats['p95_ms']:8.1f} ms p95 "
+              f"{stats['peak_rss_mb']:7.0f} MB  {page}  ({sections})")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(summary, json.load(f)["summary"], args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if not regressions:
+            print(f"no regressions against {args.baseline}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"runs": runs, "summary": summary, "regressions": regressions}, f, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
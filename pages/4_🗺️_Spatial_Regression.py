@@ -1,5 +1,9 @@
 import streamlit as st
 from streamlit.components.v1 import html
+from ssls.reports import load_report
+from ssls.memory import check_memory
+from ssls.metrics import span
+from ssls.warmup import warm_process
 
 
 # Page config
@@ -10,9 +14,13 @@ st.set_page_config(
     layout="wide"
 )
 
-with open('inputs/spatial_regression.html', 'r', encoding='utf-8') as f:
-    html_file = f.read()
+# start loading shared data/models for this worker in the background (see ssls/warmup.py)
+warm_process()
 
-# Display HTML file
-html(html_file, height=3500)
+# Display HTML file (slimmed once per process, see ssls/reports.py)
+with span("spatial.report"):
+    html(load_report('inputs/spatial_regression.html'), height=3500)
 
+
+# report worker memory and export metrics, like every page (see ssls/memory.py)
+check_memory("Spatial Regression")
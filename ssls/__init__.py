@@ -0,0 +1 @@
+# shared helpers for the SSLS dashboard pages (data prep, caching, models)
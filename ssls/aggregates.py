@@ -0,0 +1,224 @@
+"""
+Per-zone, per-month summary cube for the Listings Data page.
+
+Every stat the page shows (prices, room-type counts, vacancy rate, minimum
+nights histogram) only depends on (zone_type, zone, month), so they are all
+computed once from the calendar store and saved as one small parquet file.
+The page then looks up a single row per interaction.
+
+Rebuild with:
+    python -m ssls.aggregates
+(it also rebuilds itself when the calendar store is newer than the cube)
+"""
+import os
+import tempfile
+
+import pandas as pd
+
+from ssls.calendar_store import CALENDAR_DIR, ZONE_COLUMNS, month_key, open_store
+
+CUBE_PATH = "inputs/calendar_cube.parquet"
+
+ALL_ZONES = "All (Boston)"
+
+# listings with minimum nights at/over this are dropped from the histogram
+NIGHTS_OUTLIER = 200
+# minimum nights below this count as a short-term rental
+STR_THRESHOLD = 28
+# months whose calendar covers fewer of their days than this are left out of the
+# sidebar (a snapshot's first month, e.g. March 2023 is only its 19th-31st)
+MIN_MONTH_COVERAGE = 0.5
+
+
+def tally(df):
+    """Additive counts of one slice of the calendar, so slices can be summed (combine)."""
+    prices = df["price"]
+    nights = df.loc[df["minimum_nights"] < NIGHTS_OUTLIER, "minimum_nights"]
+    return {
+        "rows": len(df),
+        "dates": set(df["date"].unique()),
+        "price_max": prices.max(),
+        "price_min": prices[prices > 0].min(),
+        "price_sum": prices.sum(),
+        "price_count": prices.count(),
+        "room_counts": df["room_type"].value_counts(sort=False),
+        "available": df["available"].sum(),
+        "night_counts": nights.value_counts(),
+    }
+
+
+def combine(tallies):
+    """One tally of several slices."""
+    if len(tallies) == 1:
+        return tallies[0]
+
+    def counts(key):
+        # summed, keeping the order the values were first seen in
+        return pd.concat([t[key] for t in tallies]).groupby(level=0, sort=False, observed=True).sum()
+
+    return {
+        "rows": sum(t["rows"] for t in tallies),
+        "dates": set().union(*(t["dates"] for t in tallies)),
+        "price_max": pd.Series([t["price_max"] for t in tallies]).max(),
+        "price_min": pd.Series([t["price_min"] for t in tallies]).min(),
+        "price_sum": sum(t["price_sum"] for t in tallies),
+        "price_count": sum(t["price_count"] for t in tallies),
+        "room_counts": counts("room_counts"),
+        "available": sum(t["available"] for t in tallies),
+        "night_counts": counts("night_counts"),
+    }
+
+
+def finish(t):
+    """All Listings Data stats of a tally."""
+    room_counts = t["room_counts"][t["room_counts"] > 0]
+    night_counts = t["night_counts"].sort_index()
+    short = night_counts[night_counts.index < STR_THRESHOLD]
+    long = night_counts[night_counts.index >= STR_THRESHOLD]
+
+    return {
+        "rows": t["rows"],
+        "days": len(t["dates"]),
+        "high_price": t["price_max"],
+        "low_price": t["price_min"],
+        "avg_price": t["price_sum"] / t["price_count"] if t["price_count"] else float("nan"),
+        "room_types": room_counts.index.astype(str).tolist(),
+        "room_type_counts": room_counts.astype(int).tolist(),
+        "available": int(t["available"]),
+        "booked": int(t["rows"] - t["available"]),
+        "short_nights": short.index.astype(int).tolist(),
+        "short_counts": short.astype(int).tolist(),
+        "long_nights": long.index.astype(int).tolist(),
+        "long_counts": long.astype(int).tolist(),
+    }
+
+
+def summarize(df):
+    """All Listings Data stats for one slice of the calendar."""
+    return finish(tally(df))
+
+
+def summarize_month(store, month):
+    """
+    Cube rows for every zone of one month ('YYYY-MM') of the calendar store.
+
+    The month is read one neighborhood at a time (the month files are sorted
+    by zone, so each read only touches that neighborhood's row groups), like
+    the ingest's merge_month. Tracts and the whole city are summed from the
+    neighborhoods' tallies, so only one neighborhood's rows are ever in memory.
+    """
+    import pyarrow.dataset as ds
+
+    nbh_col = ZONE_COLUMNS["Neighborhoods"]
+    in_month = ds.field("month") == month
+    neighborhoods = set()
+    for batch in store.to_batches(columns=[nbh_col], filter=in_month):
+        neighborhoods.update(batch.column(0).unique().to_pylist())
+
+    tallies = {zone_type: {} for zone_type in ZONE_COLUMNS}
+    city = []
+    for nbh in sorted(neighborhoods, key=str):
+        # rows without a neighborhood still count for their tract and the city
+        in_nbh = ds.field(nbh_col).is_null() if nbh is None else ds.field(nbh_col) == nbh
+        nbh_df = store.to_table(filter=in_month & in_nbh).to_pandas()
+        for zone_type, col in ZONE_COLUMNS.items():
+            for zone, zone_df in nbh_df.groupby(col, observed=True):
+                tallies[zone_type].setdefault(zone, []).append(tally(zone_df))
+        city.append(tally(nbh_df))
+        del nbh_df
+
+    rows = []
+    for zone_type, zones in tallies.items():
+        rows.append({"zone_type": zone_type, "zone": ALL_ZONES, "month": month,
+                     **finish(combine(city))})
+        for zone in sorted(zones):
+            rows.append({"zone_type": zone_type, "zone": zone_key(zone), "month": month,
+                         **finish(combine(zones[zone]))})
+    return rows
+
+
+def _write_cube(cube, out_path):
+    # write then rename so a worker loading the cube never reads a partial file
+    fd, tmp_path = tempfile.mkstemp(suffix=".parquet", dir=os.path.dirname(os.path.abspath(out_path)))
+    with os.fdopen(fd, "wb") as f:
+        cube.to_parquet(f, index=False)
+    os.replace(tmp_path, out_path)
+
+
+def build_cube(out_path=CUBE_PATH, calendar_dir=CALENDAR_DIR):
+    """Summarize every (zone_type, zone, month) combination into one table."""
+    store = open_store(calendar_dir)
+    rows = []
+    for month in sorted(store.to_table(columns=["month"])["month"].unique().to_pylist()):
+        rows.extend(summarize_month(store, month))
+
+    cube = pd.DataFrame(rows)
+    _write_cube(cube, out_path)
+    return cube
+
+
+def update_cube(months, out_path=CUBE_PATH, calendar_dir=CALENDAR_DIR):
+    """Recompute only the rows of `months` ('YYYY-MM'), e.g. after an ingest."""
+    if not os.path.exists(out_path):
+        return build_cube(out_path, calendar_dir)
+    store = open_store(calendar_dir)
+    rows = [row for month in sorted(months) for row in summarize_month(store, month)]
+
+    cube = pd.read_parquet(out_path)
+    cube = pd.concat([cube[~cube["month"].isin(months)], pd.DataFrame(rows)], ignore_index=True)
+    cube = cube.sort_values(["month", "zone_type"], kind="stable", ignore_index=True)
+    _write_cube(cube, out_path)
+    return cube
+
+
+def zone_key(zone):
+    # tracts come in as floats from the sidebar, neighborhoods as strings
+    if zone == ALL_ZONES or isinstance(zone, str):
+        return zone
+    return str(float(zone))
+
+
+def _is_stale(out_path, calendar_dir):
+    if not os.path.exists(out_path):
+        return True
+    if not os.path.isdir(calendar_dir):
+        return False
+    newest = max((os.path.getmtime(os.path.join(root, name))
+                  for root, _, names in os.walk(calendar_dir) for name in names), default=0)
+    return newest > os.path.getmtime(out_path)
+
+
+def load_cube(out_path=CUBE_PATH, calendar_dir=CALENDAR_DIR):
+    """The cube indexed by (zone_type, zone, month), rebuilt if out of date."""
+    if _is_stale(out_path, calendar_dir):
+        build_cube(out_path, calendar_dir)
+    cube = pd.read_parquet(out_path)
+    if "days" not in cube:
+        # cube from before the day coverage was kept
+        cube = build_cube(out_path, calendar_dir)
+    return cube.set_index(["zone_type", "zone", "month"]).sort_index()
+
+
+def cube_months(cube, min_coverage=MIN_MONTH_COVERAGE):
+    """Months in the cube as sidebar labels ('April 2023'), oldest first.
+
+    Months the calendar covers less than `min_coverage` of are dropped, so the
+    default selection is a full month.
+    """
+    days = cube.xs(ALL_ZONES, level="zone")["days"].groupby(level="month").max()
+    dates = pd.to_datetime(days.index)
+    keep = days.values >= min_coverage * dates.days_in_month.values
+    return [d.strftime('%B %Y') for d in sorted(dates[keep])]
+
+
+def lookup(cube, zone_type, zone, month):
+    """One row (as a Series) of the cube for a sidebar selection, None if the
+    zone has no calendar rows that month."""
+    try:
+        return cube.loc[(zone_type, zone_key(zone), month_key(month))]
+    except KeyError:
+        return None
+
+
+if __name__ == "__main__":
+    print(f"wrote {len(build_cube())} rows to {CUBE_PATH}")
@@ -0,0 +1,57 @@
+"""
+Listing x amenity matrix for the word clouds.
+
+The amenities column of master_short.csv holds a python-literal list per
+listing. It is parsed once into a vocabulary plus a CSR sparse matrix
+(one row per listing, one column per amenity), so the amenity frequencies for
+any subset of listings are a single masked column sum.
+"""
+import ast
+
+import numpy as np
+import pandas as pd
+
+from ssls.metrics import timed
+
+
+def build_amenity_matrix(amenities):
+    """
+    Parse a Series of amenity-list strings.
+
+    Returns (vocab, matrix) where vocab is an array of amenity names and
+    matrix[i, j] is how many times listing i lists vocab[j].
+    """
+    from scipy import sparse
+
+    vocab_index = {}
+    indices = []
+    indptr = [0]
+    for amenity_str in amenities:
+        for amenity in ast.literal_eval(amenity_str):
+            indices.append(vocab_index.setdefault(amenity, len(vocab_index)))
+        indptr.append(len(indices))
+
+    data = np.ones(len(indices), dtype=np.int32)
+    matrix = sparse.csr_matrix((data, np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+                               shape=(len(amenities), len(vocab_index)))
+    matrix.sum_duplicates()
+
+    vocab = np.empty(len(vocab_index), dtype=object)
+    for amenity, j in vocab_index.items():
+        vocab[j] = amenity
+    return vocab, matrix
+
+
+@timed("amenities.counts")
+def amenity_counts(vocab, matrix, mask):
+    """Amenity frequencies over the listings where `mask` is True, most common first."""
+    mask = np.asarray(mask, dtype=bool)
+    counts = np.asarray(matrix[mask].sum(axis=0)).ravel()
+    counts = pd.Series(counts, index=vocab)
+    counts = counts[counts > 0]
+    return counts.sort_values(ascending=False, kind="stable")
+
+
+def word_freq(counts, start=5, stop=90):
+    # skip the handful of amenities nearly every listing has (wifi, smoke alarm, ...)
+    return counts.iloc[start:stop].astype(int).to_dict()
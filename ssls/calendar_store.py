@@ -0,0 +1,124 @@
+"""
+Columnar store for the daily listings calendar (inputs/master.csv).
+
+master.csv is ~3,864 listings x 365 days, but everything downstream (the
+stats cube, ingests) works one month at a time. The ingest step below
+rewrites it once as a parquet dataset partitioned by month only:
+
+    inputs/calendar/month=2023-04/part-0.parquet
+
+Nesting the zones as partitions too gave one tiny file per month/tract
+(~19k files, larger than the csv). Instead each month file is sorted by
+zone, so a filter on census_NBH/census_tract skips the row groups whose
+min/max statistics exclude it.
+
+Build it ahead of time with:
+    python -m ssls.calendar_store
+"""
+import os
+
+import pandas as pd
+
+MASTER_CSV = "inputs/master.csv"
+# one row per listing, derived from master.csv and kept up to date by ssls/ingest.py
+LISTINGS_CSV = "inputs/master_short.csv"
+CALENDAR_DIR = "inputs/calendar"
+
+# zone_type (sidebar) -> calendar column holding the zone label
+ZONE_COLUMNS = {
+    "Neighborhoods": "census_NBH",
+    "Census-Tracts": "census_tract",
+}
+
+CATEGORICAL_COLUMNS = ["room_type"]
+
+# order of the rows inside a month file, and its row group size
+SORT_COLUMNS = ["census_NBH", "census_tract", "id", "date"]
+ROW_GROUP_ROWS = 64 * 1024
+
+
+def partitioning():
+    # pyarrow is only imported once the store is used
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive")
+
+
+def month_key(month):
+    # 'April 2023' / Timestamp -> '2023-04' (the partition value)
+    return pd.to_datetime(month).strftime("%Y-%m")
+
+
+def to_bool(flags):
+    # Inside Airbnb writes 't'/'f'
+    if flags.dtype == bool:
+        return flags
+    return flags.astype(str).str.lower().isin(["t", "true"])
+
+
+def parse_price(prices):
+    # '$1,234.00' -> 1234.0
+    if prices.dtype.kind in "fiu":
+        return prices.astype(float)
+    return pd.to_numeric(prices.astype(str).str.replace(r"[$,]", "", regex=True), errors="coerce")
+
+
+def clean_calendar(df):
+    """Give a raw calendar frame the dtypes the store keeps on disk."""
+    df = df.copy()
+    df["date"] = pd.to_datetime(df["date"])
+    df["available"] = to_bool(df["available"])
+    df["price"] = parse_price(df["price"])
+    for col in CATEGORICAL_COLUMNS:
+        df[col] = df[col].astype("category")
+    df["census_NBH"] = df["census_NBH"].astype(str)
+    df["census_tract"] = df["census_tract"].astype(float)
+    # numpy month truncation, much faster than dt.strftime on millions of rows
+    df["month"] = df["date"].values.astype("datetime64[M]").astype(str)
+    return df
+
+
+def write_partitions(df, out_dir=CALENDAR_DIR, existing_data_behavior="overwrite_or_ignore",
+                     basename_template=None):
+    """
+    Write a cleaned calendar frame into the partitioned dataset, sorted by
+    zone within each month. Pass a distinct basename_template
+    ('chunk-3-{i}.parquet') to add files next to ones already in a partition.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    df = df.sort_values(["month"] + SORT_COLUMNS, kind="stable", ignore_index=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    ds.write_dataset(
+        table,
+        out_dir,
+        format="parquet",
+        partitioning=partitioning(),
+        existing_data_behavior=existing_data_behavior,
+        basename_template=basename_template,
+        min_rows_per_group=ROW_GROUP_ROWS,
+        max_rows_per_group=ROW_GROUP_ROWS,
+    )
+
+
+def build_store(csv_path=MASTER_CSV, out_dir=CALENDAR_DIR):
+    """One-off ingest: master.csv -> partitioned parquet."""
+    master = pd.read_csv(csv_path)
+    write_partitions(clean_calendar(master), out_dir,
+                     existing_data_behavior="delete_matching")
+    return out_dir
+
+
+def open_store(out_dir=CALENDAR_DIR):
+    import pyarrow.dataset as ds
+
+    # build on first use so a fresh checkout with only master.csv still runs
+    if not os.path.isdir(out_dir):
+        build_store(out_dir=out_dir)
+    return ds.dataset(out_dir, format="parquet", partitioning=partitioning())
+
+
+if __name__ == "__main__":
+    print(f"wrote {build_store()}")
@@ -0,0 +1,86 @@
+"""
+Zone-keyed census lookup for the Census Info page.
+
+NBH_census_data.csv is keyed by neighborhood name and tract_census_data.csv
+by TRACTCE20, while the sidebar gives a zone name (a float NAME20 for
+tracts), so the page used to go zone name -> TRACTCE20 -> scan of the census
+rows -> positional column slices, once per pie. CensusLookup does that join
+once per zone type, together with the BNB counts of the zone table, and
+keeps the population and household counts as contiguous int64 arrays (one
+row per zone) with the Boston-wide sums as an extra last row, so each chart
+is a dict lookup and a row slice.
+"""
+import numpy as np
+import pandas as pd
+
+from ssls.aggregates import ALL_ZONES
+from ssls.zone_tables import read_zone_table
+
+# zone_type (sidebar) -> (census csv, column holding the zone key)
+CENSUS_TABLES = {
+    "Neighborhoods": ("inputs/NBH_census_data.csv", "field concept"),
+    "Census-Tracts": ("inputs/tract_census_data.csv", "Census Tract"),
+}
+
+TOTAL_COL = "Total:"
+HOUSEHOLD_COLS = ["Occupied", "Vacant"]
+
+
+def read_census(zone_type):
+    csv_path, _ = CENSUS_TABLES[zone_type]
+    return pd.read_csv(csv_path)
+
+
+class CensusLookup:
+    """Census counts and BNBs of one zone type, by sidebar zone name (or ALL_ZONES)."""
+
+    def __init__(self, zone_type):
+        csv_path, key_col = CENSUS_TABLES[zone_type]
+        census = read_census(zone_type)
+
+        if zone_type == "Census-Tracts":
+            # the census rows are keyed by TRACTCE20, the sidebar by NAME20
+            zones = read_zone_table(zone_type, ["TRACTCE20", "BNBs"])
+            keys = zones["TRACTCE20"]
+        else:
+            zones = read_zone_table(zone_type, ["BNBs"])
+            keys = pd.Series(zones.index, index=zones.index)
+        census = census.set_index(key_col).reindex(keys.values)
+        missing = census.index[census[TOTAL_COL].isna()]
+        if len(missing):
+            raise KeyError(f"{csv_path} has no rows for zones: {list(missing)}")
+
+        self.zone_type = zone_type
+        self.group_labels = [col for col in census.columns if col not in [TOTAL_COL] + HOUSEHOLD_COLS]
+        self.household_labels = list(HOUSEHOLD_COLS)
+
+        # zone name -> row; ALL_ZONES is the last row, the sum of all the others
+        self.rows = {name: i for i, name in enumerate(zones.index)}
+        self.rows[ALL_ZONES] = len(zones)
+
+        def with_total(values):
+            values = values.astype(np.int64)
+            return np.ascontiguousarray(np.vstack([values, values.sum(axis=0)]))
+
+        self.population = with_total(census[self.group_labels].to_numpy())
+        self.households = with_total(census[HOUSEHOLD_COLS].to_numpy())
+        self.total = with_total(census[TOTAL_COL].to_numpy()[:, None]).ravel()
+        self.bnbs = np.append(zones["BNBs"].fillna(0).to_numpy(dtype=np.int64),
+                              int(zones["BNBs"].fillna(0).sum()))
+
+    def demographics(self, zone_select):
+        """(non-zero group counts, their labels, total population)."""
+        i = self.rows[zone_select]
+        values = self.population[i]
+        keep = np.flatnonzero(values)
+        return values[keep].tolist(), [self.group_labels[j] for j in keep], int(self.total[i])
+
+    def vacancy(self, zone_select):
+        """(non-zero occupied/vacant counts, their labels, total households)."""
+        i = self.rows[zone_select]
+        values = self.households[i]
+        keep = np.flatnonzero(values)
+        return values[keep].tolist(), [self.household_labels[j] for j in keep], int(values.sum())
+
+    def listings(self, zone_select):
+        return int(self.bnbs[self.rows[zone_select]])
@@ -0,0 +1,71 @@
+"""
+Small client-rendered charts for the Listings Data and Census Info pages.
+
+Each chart is built from already aggregated counts (tens of rows at most)
+as a plotly figure, which the browser draws. Nothing is rasterized on the
+server and there are no matplotlib figures to close.
+"""
+import plotly.graph_objects as go
+
+# zone_type (sidebar) -> (dark, light) bar colors, matching the map scales
+PALETTES = {
+    "Neighborhoods": ("#d94801", "#fdae6b"),
+    "Census-Tracts": ("#2171b5", "#9ecae1"),
+}
+
+COUNT_LABEL = 'Count<br>(days * listings in selected month)'
+
+
+def _note(fig, text, y):
+    # boxed annotation to the right of the plot, like the old matplotlib ones
+    fig.add_annotation(text=text, xref="paper", yref="paper", x=1.02, y=y,
+                       xanchor="left", showarrow=False,
+                       bordercolor="black", borderwidth=1, bgcolor="white")
+    fig.update_layout(margin=dict(r=200))
+
+
+def room_type_bar(room_types, counts, zone_type):
+    dark, light = PALETTES[zone_type]
+    colors = [dark if i % 2 == 0 else light for i in range(len(room_types))]
+    fig = go.Figure(go.Bar(x=list(counts), y=list(room_types), orientation='h',
+                           marker_color=colors))
+    fig.update_layout(title='Room-Type Distribution', xaxis_title=COUNT_LABEL,
+                      yaxis_title='Room Type', yaxis_autorange='reversed')
+    return fig
+
+
+def availability_bar(available, booked, vac_rate, zone_type):
+    dark, light = PALETTES[zone_type]
+    fig = go.Figure([
+        go.Bar(x=[available], y=['t'], orientation='h', name='available', marker_color=dark),
+        go.Bar(x=[booked], y=['f'], orientation='h', name='booked', marker_color=light),
+    ])
+    fig.update_layout(title='Availability of Listings', xaxis_title=COUNT_LABEL,
+                      yaxis_title='Available', barmode='overlay')
+    _note(fig, f'Vacancy Rate: {vac_rate}', 0.4)
+    return fig
+
+
+def nights_histogram(short_nights, short_counts, long_nights, long_counts,
+                     short_term_percent, zone_type, threshold=28):
+    """Stacked minimum-nights histogram (one bar per night count) with the STR threshold."""
+    dark, light = PALETTES[zone_type]
+    fig = go.Figure([
+        go.Bar(x=list(short_nights), y=list(short_counts), name='short-term', marker_color=dark),
+        go.Bar(x=list(long_nights), y=list(long_counts), name='long-term', marker_color=light),
+    ])
+    fig.update_layout(title='Short-Term Rentals', xaxis_title='Minimum Nights',
+                      yaxis_title=COUNT_LABEL, barmode='stack', bargap=0)
+    fig.add_vline(x=threshold, line_color='red', line_width=1,
+                  annotation_text='STR Threshold', annotation_textangle=-90,
+                  annotation_font_color='red')
+    _note(fig, f'Short-Term Listings: {short_term_percent * 100:.0f}%', 0.7)
+    return fig
+
+
+def pie(values, labels, title, note):
+    fig = go.Figure(go.Pie(values=list(values), labels=list(labels),
+                           texttemplate='%{percent:.1%}', sort=False))
+    fig.update_layout(title=title)
+    _note(fig, note, 0.5)
+    return fig
@@ -0,0 +1,146 @@
+"""
+Lightweight runtime for the exported price models.
+
+An exported model is a folder holding `spec.json` (input columns, feature
+encoding, estimator kind) and a few .npy arrays (coefficients, or the
+flattened nodes of every tree). Predicting only needs numpy/pandas, so the
+app does not have to unpickle sklearn pipelines.
+
+Folders are written by ssls/model_export.py. Arrays are memory-mapped
+read-only by default, so every worker process on a machine shares the same
+pages of the OS file cache instead of holding its own copy.
+"""
+import json
+import os
+import threading
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+from ssls.metrics import cache_event, span
+
+SPEC_FILE = "spec.json"
+
+
+class CompiledModel:
+    """numpy-only stand-in for a fitted sklearn price pipeline."""
+
+    def __init__(self, spec, arrays):
+        self.spec = spec
+        self.arrays = arrays
+        self.columns = spec["columns"]
+        # category lookups are built once, not per predict
+        self._indexers = {
+            i: pd.Index(enc["categories"])
+            for i, enc in enumerate(spec["encoders"]) if enc["kind"] == "onehot"
+        }
+
+    @classmethod
+    def load(cls, model_dir, mmap_mode=None):
+        with open(os.path.join(model_dir, SPEC_FILE), "r", encoding="utf-8") as f:
+            spec = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(model_dir, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in spec["arrays"]
+        }
+        return cls(spec, arrays)
+
+    def transform(self, df):
+        """Encode a frame of raw inputs into the estimator's feature matrix."""
+        blocks = []
+        for i, enc in enumerate(self.spec["encoders"]):
+            values = df[enc["column"]].to_numpy()
+            if enc["kind"] == "onehot":
+                codes = self._indexers[i].get_indexer(values)
+                if (codes < 0).any() and enc["unknown"] != "ignore":
+                    unknown = values[codes < 0]
+                    raise ValueError(f"unknown categories {list(unknown)} in column {enc['column']!r}")
+                block = np.zeros((len(values), len(enc["categories"])))
+                rows = np.flatnonzero(codes >= 0)
+                block[rows, codes[rows]] = 1.0
+                if enc["drop"] is not None:
+                    block = np.delete(block, enc["drop"], axis=1)
+            else:
+                block = values.astype(float).reshape(-1, 1)
+                if enc["kind"] == "scale":
+                    if enc["mean"] is not None:
+                        block = block - enc["mean"]
+                    if enc["scale"] is not None:
+                        block = block / enc["scale"]
+            blocks.append(block)
+        return np.hstack(blocks) if blocks else np.empty((len(df), 0))
+
+    def _predict_trees(self, X):
+        a = self.arrays
+        est = self.spec["estimator"]
+        # sklearn compares float32 features against the split thresholds
+        X = X.astype(np.float32)
+        rows = np.arange(len(X))
+
+        # walk every tree for every row at once, one tree level per iteration
+        node = np.repeat(a["roots"][:, None], len(X), axis=1)
+        while True:
+            left = a["left"][node]
+            at_leaf = left == -1
+            if at_leaf.all():
+                break
+            go_left = X[rows, a["feature"][node]] <= a["threshold"][node]
+            node = np.where(at_leaf, node, np.where(go_left, left, a["right"][node]))
+
+        per_tree = a["value"][node]
+        if est["average"]:
+            return per_tree.mean(axis=0)
+        return est["baseline"] + est["learning_rate"] * per_tree.sum(axis=0)
+
+    def predict(self, df):
+        X = self.transform(df[self.columns])
+        est = self.spec["estimator"]
+        if est["kind"] == "linear":
+            return X @ self.arrays["coef"] + est["intercept"]
+        return self._predict_trees(X)
+
+
+class LazyModels(Mapping):
+    """
+    Model name -> CompiledModel, loading each model only when first asked for.
+
+    A prediction for one month only touches that month's model; the others
+    are never read from disk.
+    """
+
+    def __init__(self, models_dir, mmap_mode="r"):
+        self.models_dir = models_dir
+        self.mmap_mode = mmap_mode
+        self._names = sorted(
+            name for name in os.listdir(models_dir)
+            if os.path.exists(os.path.join(models_dir, name, SPEC_FILE))
+        )
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        model = self._models.get(name)
+        if model is None:
+            if name not in self._names:
+                raise KeyError(name)
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    cache_event("models", "miss")
+                    with span("compiled.load"):
+                        model = CompiledModel.load(os.path.join(self.models_dir, name),
+                                                   mmap_mode=self.mmap_mode)
+                    self._models[name] = model
+        return model
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+
+def load_compiled_models(models_dir, mmap_mode="r"):
+    """Lazy dict of model name -> CompiledModel for every exported model folder."""
+    return LazyModels(models_dir, mmap_mode=mmap_mode)
@@ -0,0 +1,92 @@
+"""
+Shared data access for every page.
+
+Each dataset is loaded once per process with st.cache_resource (no copy per
+access, unlike st.cache_data) already indexed the way the pages use it, and
+shared by all pages and sessions (the load itself is timed, see ssls/metrics.py).
+Pages must treat them as read-only and never modify one in place. Every
+dataset is loaded through this module, so importing it switches pandas to
+copy-on-write (the default from pandas 3 on) under `streamlit run` and
+ssls/serve.py alike, and any frame a page derives from a shared one
+(filters, assign, query, ...) can never write back into the original.
+"""
+import pandas as pd
+import streamlit as st
+
+from ssls.aggregates import load_cube
+from ssls.amenities import build_amenity_matrix
+from ssls.calendar_store import LISTINGS_CSV
+from ssls.census import CensusLookup
+from ssls.geometry import load_geojson
+from ssls.memory import register_cache
+from ssls.metrics import timed
+from ssls.pricing import load_models
+from ssls.wordclouds import default_cache
+from ssls.zone_tables import read_zone_table
+
+# before any dataset is loaded; pandas 3 always copies on write and deprecates the option
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+@st.cache_resource
+@timed("data.zone_table")
+def zone_table(zone_type):
+    """boston_NBH.csv / boston_tract.csv attributes (no geometry) indexed by zone name."""
+    return read_zone_table(zone_type)
+
+
+def zone_names(zone_type, with_listings=False):
+    """Zone names for the sidebar, optionally only zones with listings."""
+    zones = zone_table(zone_type)
+    if with_listings:
+        zones = zones[zones['BNBs'] != 0]
+    return zones.index.tolist()
+
+
+@st.cache_resource
+@timed("data.census_lookup")
+def census_lookup(zone_type):
+    """Census counts joined with the BNB counts, by zone name (see ssls/census.py)."""
+    return CensusLookup(zone_type)
+
+
+@st.cache_resource
+@timed("data.listings")
+def listings():
+    """master_short.csv, one row per listing."""
+    return pd.read_csv(LISTINGS_CSV)
+
+
+@st.cache_resource
+@timed("data.amenity_matrix")
+def amenity_matrix():
+    """(vocab, sparse listing x amenity matrix), rows aligned with listings()."""
+    return build_amenity_matrix(listings()['amenities'])
+
+
+@st.cache_resource
+@timed("data.stats_cube")
+def stats_cube():
+    return load_cube()
+
+
+@st.cache_resource
+@timed("data.zone_geojson")
+def zone_geojson(zone_type, level="city"):
+    return load_geojson(zone_type, level)
+
+
+@st.cache_resource
+@timed("data.zone_models")
+def load_zone_models(zone_type):
+    """Price models for a zone type; only a month's model that is asked for is read (see ssls/pricing.py)."""
+    return load_models(zone_type)
+
+
+@st.cache_resource
+def word_cloud_cache():
+    """The worker's rendered word-cloud LRU (see ssls/wordclouds.py)."""
+    cache = default_cache()
+    register_cache(cache.clear)
+    return cache
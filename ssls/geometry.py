@@ -0,0 +1,110 @@
+"""
+Pre-projected, simplified GeoJSON for the choropleth maps.
+
+The Census2020 shapefiles are in a state-plane CRS at survey resolution. Every
+map used to reproject them and ship the full geometry to the browser on each
+rerun. Here each zone layer is reprojected to EPSG:4326 once, simplified for
+the zoom level it is drawn at, has its coordinates rounded, and is kept as a
+GeoJSON dict in memory and under inputs/geo_cache/.
+
+Rebuild with:
+    python -m ssls.geometry
+"""
+import json
+import os
+import tempfile
+from functools import lru_cache
+
+import numpy as np
+
+from ssls.metrics import register_lru, timed
+
+GEO_CACHE_DIR = "inputs/geo_cache"
+
+# zone_type (sidebar) -> (shapefile, id column)
+ZONE_LAYERS = {
+    "Neighborhoods": ("inputs/Census2020_BG_Neighborhoods/Census2020_BG_Neighborhoods.shp", "BlockGr202"),
+    "Census-Tracts": ("inputs/Census2020_Tracts/Census2020_Tracts.shp", "NAME20"),
+}
+
+# simplification tolerance in degrees per zoom level (~50m for the city map,
+# the only one the pages draw)
+TOLERANCES = {
+    "city": 0.0005,
+}
+
+# 5 decimal places is ~1m, well under what the maps can show
+COORD_DECIMALS = 5
+
+
+def simplify_layer(geoms, tolerance):
+    import shapely
+    # coverage_simplify keeps shared borders shared (no slivers/gaps between
+    # zones); older shapely falls back to per-polygon topology preservation
+    if hasattr(shapely, "coverage_simplify"):
+        return shapely.coverage_simplify(geoms, tolerance)
+    return shapely.simplify(geoms, tolerance, preserve_topology=True)
+
+
+@timed("geometry.build_geojson")
+def build_geojson(zone_type, level="city"):
+    """Reproject, simplify and quantize one zone layer into a GeoJSON dict."""
+    # geopandas/shapely are only needed when the cached GeoJSON is missing
+    import geopandas as gpd
+    import shapely
+    from shapely.geometry import mapping
+
+    shp_path, id_col = ZONE_LAYERS[zone_type]
+    layer = gpd.read_file(shp_path).to_crs("epsg:4326")
+
+    geoms = simplify_layer(np.asarray(layer.geometry.values), TOLERANCES[level])
+    geoms = shapely.transform(geoms, lambda coords: np.round(coords, COORD_DECIMALS))
+
+    features = [
+        {"type": "Feature", "id": str(zone_id), "properties": {},
+         "geometry": mapping(geom)}
+        for zone_id, geom in zip(layer[id_col], geoms)
+    ]
+    return {"type": "FeatureCollection", "features": features}
+
+
+def cache_path(zone_type, level):
+    return os.path.join(GEO_CACHE_DIR, f"{ZONE_LAYERS[zone_type][1]}_{level}.geojson")
+
+
+@lru_cache(maxsize=None)
+def load_geojson(zone_type, level="city"):
+    """
+    GeoJSON for a zone layer, read from the on-disk cache (built on first use).
+
+    Feature ids are the zone names, in shapefile order.
+    """
+    path = cache_path(zone_type, level)
+    if not os.path.exists(path):
+        geojson = build_geojson(zone_type, level)
+        os.makedirs(GEO_CACHE_DIR, exist_ok=True)
+        # write then rename so another worker never reads a partial file
+        fd, tmp_path = tempfile.mkstemp(suffix=".json", dir=GEO_CACHE_DIR)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(geojson, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        return geojson
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+register_lru("geojson", load_geojson)
+
+
+def zone_ids(geojson):
+    return [feature["id"] for feature in geojson["features"]]
+
+
+if __name__ == "__main__":
+    for zone_type in ZONE_LAYERS:
+        for level in TOLERANCES:
+            path = cache_path(zone_type, level)
+            if os.path.exists(path):
+                os.remove(path)
+            load_geojson(zone_type, level)
+            print(f"wrote {path} ({os.path.getsize(path) / 1024:.0f} KB)")
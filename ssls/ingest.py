@@ -0,0 +1,264 @@
+"""
+Incremental ingest of a new Inside Airbnb snapshot.
+
+A snapshot is the calendar.csv.gz and listings.csv.gz of one scrape. Instead
+of regenerating master.csv, master_short.csv and the stats cube in full, the
+snapshot is merged in place:
+
+- calendar.csv is streamed in blocks sized to a memory budget
+  (SSLS_INGEST_BUDGET_MB, default 256), so metros with tens of millions of
+  calendar rows never have to fit in one frame,
+- calendar rows are deduplicated on (id, date) in Arrow, one month and
+  neighborhood at a time, the newer snapshot winning, and only the calendar
+  store months the snapshot covers are rewritten (keeping the store's
+  column types),
+- only those months' rows of the stats cube are recomputed, again one
+  neighborhood at a time,
+- listings are upserted into master_short.csv by id, and the zone tables'
+  BNBs/BNBDensity are updated for the zones whose count changed.
+
+The Listings Data month list comes from the cube, so new months show up once
+the app is restarted.
+
+    python -m ssls.ingest path/to/calendar.csv.gz path/to/listings.csv.gz
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+
+import pandas as pd
+
+from ssls.aggregates import update_cube
+from ssls.calendar_store import (CALENDAR_DIR, LISTINGS_CSV, MASTER_CSV, ROW_GROUP_ROWS, SORT_COLUMNS,
+                                 build_store, clean_calendar, open_store, parse_price, partitioning,
+                                 write_partitions)
+from ssls.zones import assign_zones, update_zone_tables
+
+CALENDAR_KEY = ["id", "date"]
+
+# master_short.csv columns, taken from a listings.csv snapshot
+LISTING_COLUMNS = ["id", "room_type", "minimum_nights", "census_tract", "census_NBH", "amenities", "price"]
+
+# raw calendar columns kept by the ingest
+CALENDAR_COLUMNS = ["listing_id", "date", "available", "price", "minimum_nights"]
+
+# months are parsed into STAGING_DIR, merged with the store's rows in
+# MERGED_DIR, then swapped into the store (pyarrow dataset discovery ignores
+# directories with a leading underscore)
+STAGING_DIR = "_staging"
+MERGED_DIR = "_merged"
+
+# peak memory for parsing a calendar.csv, in MB
+BUDGET_ENV = "SSLS_INGEST_BUDGET_MB"
+DEFAULT_BUDGET_MB = 256
+
+# rows parsed up front to size the blocks
+SAMPLE_ROWS = 10_000
+# a block is held as the raw frame plus ~3 copies while joining/cleaning/converting to arrow
+BLOCK_COPIES = 3
+
+
+def read_listings(listings_path):
+    """A listings.csv snapshot labelled with its zones; listings outside Boston are dropped."""
+    listings = pd.read_csv(listings_path, usecols=["id", "room_type", "minimum_nights", "amenities",
+                                                   "price", "latitude", "longitude"])
+    listings["price"] = parse_price(listings["price"])
+    listings = assign_zones(listings)
+    return listings.dropna(subset=["census_NBH", "census_tract"])
+
+
+def memory_budget_mb():
+    return float(os.environ.get(BUDGET_ENV, DEFAULT_BUDGET_MB))
+
+
+def calendar_rows(chunk, listings):
+    """
+    One block of a raw calendar.csv in the calendar store's layout (room type
+    and zones joined from the listing, price/available parsed).
+    """
+    calendar = chunk.rename(columns={"listing_id": "id"})
+    calendar = calendar.merge(
+        listings[["id", "room_type", "census_NBH", "census_tract", "price", "minimum_nights"]],
+        on="id", how="inner", suffixes=("", "_listing"))
+    # newer scrapes leave the calendar price/minimum nights empty, use the listing's
+    for col in ["price", "minimum_nights"]:
+        calendar[col] = parse_price(calendar[col]).fillna(calendar.pop(f"{col}_listing"))
+    # whole nights, int64 like the store built from master.csv; rows with no
+    # minimum nights in either the calendar or the listing can't be stored
+    calendar = calendar.dropna(subset=["minimum_nights"])
+    calendar["minimum_nights"] = calendar["minimum_nights"].round().astype("int64")
+    return clean_calendar(calendar)
+
+
+def chunk_rows(calendar_path, listings, budget_mb):
+    """Rows per block so that a parsed block (and its copies) stays within budget_mb."""
+    sample = pd.read_csv(calendar_path, usecols=CALENDAR_COLUMNS, nrows=SAMPLE_ROWS)
+    raw_bytes = sample.memory_usage(deep=True).sum()
+    clean_bytes = calendar_rows(sample, listings).memory_usage(deep=True).sum()
+    row_bytes = (raw_bytes + BLOCK_COPIES * clean_bytes) / max(len(sample), 1)
+    return max(int(budget_mb * 2**20 / max(row_bytes, 1)), 1000)
+
+
+def stream_calendar(calendar_path, listings, staging, budget_mb):
+    """
+    Parse a calendar.csv(.gz) block by block into a partitioned dataset under
+    `staging`. Only one block is in memory at a time. Returns the months seen.
+    """
+    rows_per_block = chunk_rows(calendar_path, listings, budget_mb)
+    months = set()
+    blocks = pd.read_csv(calendar_path, usecols=CALENDAR_COLUMNS, chunksize=rows_per_block)
+    for i, block in enumerate(blocks):
+        rows = calendar_rows(block, listings)
+        months.update(rows["month"].unique())
+        write_partitions(rows, staging, basename_template=f"block-{i}-{{i}}.parquet")
+    return sorted(months)
+
+
+def _zone_values(datasets, column):
+    # distinct values of one column, scanned batch by batch
+    values = set()
+    for dataset in datasets:
+        for batch in dataset.to_batches(columns=[column]):
+            values.update(batch.column(0).unique().to_pylist())
+    return sorted(values, key=str)
+
+
+def _latest_rows(table):
+    # one row per (id, date), the last one written winning
+    import pyarrow as pa
+
+    table = table.append_column("_row", pa.array(range(len(table)), pa.int64()))
+    last = table.group_by(CALENDAR_KEY, use_threads=False).aggregate([("_row", "max")])
+    return table.take(last["_row_max"]).drop_columns("_row")
+
+
+def merge_month(stored_dir, staged_dir, out_path, schema):
+    """
+    Write one month of the store: its stored rows (if any) updated with the
+    staged snapshot rows, deduplicated on (id, date) with the snapshot winning.
+
+    Works one neighborhood at a time. The stored file is sorted by zone, so
+    its row-group statistics skip the other neighborhoods. Besides one
+    neighborhood's rows only the month's new (id, date) keys are held, and
+    the output stays sorted by SORT_COLUMNS and cast to the store's `schema`.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    staged = ds.dataset(staged_dir, format="parquet")
+    stored = ds.dataset(stored_dir, format="parquet") if stored_dir else None
+    datasets = [staged] + ([stored] if stored else [])
+    # only the key columns of the whole month: a listing may have moved zone
+    new_keys = staged.to_table(columns=CALENDAR_KEY) if stored else None
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+
+    with pq.ParquetWriter(out_path, schema) as writer:
+        for zone in _zone_values(datasets, "census_NBH"):
+            in_zone = ds.field("census_NBH") == zone
+            rows = [_latest_rows(staged.to_table(filter=in_zone)).select(schema.names).cast(schema)]
+            if stored:
+                old = stored.to_table(filter=in_zone)
+                old = old.join(new_keys, keys=CALENDAR_KEY, join_type="left anti")
+                rows.append(old.select(schema.names).cast(schema))
+            zone_rows = pa.concat_tables(rows).sort_by([(col, "ascending") for col in SORT_COLUMNS])
+            writer.write_table(zone_rows, row_group_size=ROW_GROUP_ROWS)
+
+
+def upsert_calendar(calendar_path, listings, out_dir=CALENDAR_DIR, budget_mb=None):
+    """
+    Merge a raw calendar into the store, rewriting only the months it touches.
+    Returns those months ('YYYY-MM').
+
+    The file is streamed in blocks sized to the memory budget, and each month
+    is then merged one neighborhood at a time (see merge_month).
+    """
+    import pyarrow.dataset as ds
+
+    budget_mb = budget_mb or memory_budget_mb()
+    if not os.path.isdir(out_dir) and os.path.exists(MASTER_CSV):
+        build_store(out_dir=out_dir)
+    staging = os.path.join(out_dir, STAGING_DIR)
+    merged_dir = os.path.join(out_dir, MERGED_DIR)
+    for path in (staging, merged_dir):
+        shutil.rmtree(path, ignore_errors=True)
+
+    months = stream_calendar(calendar_path, listings, staging, budget_mb)
+
+    # new months are written with the store's column types (e.g. int64 minimum_nights)
+    store = open_store(out_dir) if os.path.isdir(out_dir) else None
+    staged = ds.dataset(staging, format="parquet", partitioning=partitioning())
+    schema = (store if store and store.files else staged).schema
+    schema = schema.remove_metadata()
+    schema = schema.remove(schema.get_field_index("month"))
+
+    for month in months:
+        part = f"month={month}"
+        stored_dir = os.path.join(out_dir, part)
+        source = os.path.join(merged_dir, part)
+        merge_month(stored_dir if os.path.isdir(stored_dir) else None,
+                    os.path.join(staging, part), os.path.join(source, "part-0.parquet"), schema)
+        shutil.rmtree(stored_dir, ignore_errors=True)
+        os.replace(source, stored_dir)
+
+    for path in (staging, merged_dir):
+        shutil.rmtree(path, ignore_errors=True)
+    return months
+
+
+def listing_text(listings):
+    """Listings formatted the way master_short.csv writes them ('512', '1402.02', '188.0')."""
+    text = listings.astype(str)
+    text["id"] = listings["id"].astype("int64").astype(str)
+    # missing minimum nights stay empty cells, as to_csv writes NaN
+    nights = listings["minimum_nights"].round().astype("Int64")
+    text["minimum_nights"] = nights.astype(str).where(nights.notna(), "")
+    text["census_tract"] = [repr(float(v)).removesuffix(".0") for v in listings["census_tract"]]
+    text["price"] = [repr(float(v)) for v in listings["price"]]
+    return text
+
+
+def upsert_listings(listings, csv_path=LISTINGS_CSV):
+    """Replace/append listings in master_short.csv by id, leaving the other rows as written."""
+    current = pd.read_csv(csv_path, dtype=str, keep_default_na=False).set_index("id")
+    new = listing_text(listings[["id"] + list(current.columns)])
+    new = new.drop_duplicates(subset="id", keep="last").set_index("id")
+    # known listings are updated where they are, new ones appended
+    current.update(new)
+    merged = pd.concat([current, new[~new.index.isin(current.index)]]).reset_index()
+    merged.to_csv(csv_path, index=False)
+    return merged
+
+
+def ingest_snapshot(calendar_path, listings_path, out_dir=CALENDAR_DIR, budget_mb=None):
+    """Merge one snapshot in (see module docstring). Returns (months, changed zones)."""
+    listings = read_listings(listings_path)
+    months = upsert_calendar(calendar_path, listings, out_dir, budget_mb)
+    update_cube(months, calendar_dir=out_dir)
+    upsert_listings(listings[LISTING_COLUMNS])
+    changed = update_zone_tables(listings)
+    return months, changed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge a new Inside Airbnb snapshot into the dashboard data.")
+    parser.add_argument("calendar", help="calendar.csv(.gz) of the snapshot")
+    parser.add_argument("listings", help="listings.csv(.gz) of the snapshot")
+    parser.add_argument("--memory-mb", type=float,
+                        help=f"memory budget for parsing the calendar (default ${BUDGET_ENV} or {DEFAULT_BUDGET_MB})")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    months, changed = ingest_snapshot(args.calendar, args.listings, budget_mb=args.memory_mb)
+    seconds = time.perf_counter() - start
+
+    print(f"ingested {len(months)} months ({', '.join(months)}) in {seconds:.1f}s")
+    for zone_type, zones in changed.items():
+        print(f"{zone_type}: {len(zones)} zones updated")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
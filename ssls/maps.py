@@ -0,0 +1,78 @@
+"""
+Shared Neighborhoods/Census-Tracts choropleth.
+
+The base figure (geometry, colors, hover text) only depends on the zone type,
+so it is built once per zone type and kept as a plotly figure dict. Selecting
+a zone only swaps `selectedpoints` on a shallow copy of that dict, the
+geometry itself is never rebuilt or copied.
+"""
+from functools import lru_cache
+
+from ssls.data import zone_geojson, zone_table
+from ssls.geometry import zone_ids
+from ssls.metrics import payload, register_lru, span
+
+# zone_type (sidebar) -> color scale
+COLOR_SCALES = {
+    "Neighborhoods": "Oranges",
+    "Census-Tracts": None,
+}
+
+# hover styles used by the pages
+HOVER_TEMPLATES = {
+    "density": '<b>%{location}</b><br>' +
+               'BNB Density: %{z}<br>',
+    "listings": '<b>%{location}</b><br>' +
+                'BNB Density: %{z}<br>' +
+                '# of BNB listings: %{customdata}',
+}
+
+
+@lru_cache(maxsize=None)
+def base_figure(zone_type, hover="density"):
+    """The unselected map for a zone type, as a plotly figure dict."""
+    import plotly.express as px
+
+    zones = zone_table(zone_type)
+    geojson = zone_geojson(zone_type)
+
+    if hover == "listings":
+        extra = {"custom_data": ['BNBs']}
+    else:
+        extra = {"hover_data": ['BNBs']}
+
+    with span("maps.choropleth"):
+        fig = px.choropleth(zones,
+                            geojson=geojson,
+                            locations=zone_ids(geojson),
+                            color="BNBDensity",
+                            color_continuous_scale=COLOR_SCALES[zone_type],
+                            **extra)
+        fig.update_geos(fitbounds="locations", visible=False)
+        fig.update_traces(hovertemplate=HOVER_TEMPLATES[hover])
+        return fig.to_plotly_json()
+
+
+@lru_cache(maxsize=None)
+def payload_bytes(zone_type, hover="density"):
+    # serialized once per base map, about what every rerun sends for the map
+    import plotly.io as pio
+    return len(pio.to_json(base_figure(zone_type, hover), validate=False))
+
+
+register_lru("base_figure", base_figure)
+
+
+def selected_points(zone_type, zone_select):
+    zones = zone_table(zone_type)
+    if zone_select == "All (Boston)":
+        return list(range(len(zones)))
+    return [int(zones.loc[zone_select, 'OBJECTID']) - 1]
+
+
+def zone_map(zone_type, zone_select, hover="density"):
+    """Base map for `zone_type` with `zone_select` highlighted."""
+    base = base_figure(zone_type, hover)
+    payload("map", payload_bytes(zone_type, hover))
+    trace = dict(base["data"][0], selectedpoints=selected_points(zone_type, zone_select))
+    return {"data": [trace] + list(base["data"][1:]), "layout": base["layout"]}
@@ -0,0 +1,117 @@
+"""
+Worker memory reporting and a soft memory budget.
+
+Pages used to delete every global and run gc.collect() at the end of each
+rerun. Instead, datasets are loaded once per process (ssls/data.py), the
+per-selection caches are bounded (LRU for word clouds), charts are rendered
+client-side, and `check_memory` runs at the end of each page: it logs the
+worker's resident memory and, only when the worker is over budget, trims
+the caches and collects once.
+
+The budget is SSLS_MEMORY_BUDGET_MB per worker (default 1024). Freed memory
+is often not given back to the OS, so RSS can stay over budget right after a
+trim. To avoid clearing and collecting on every rerun from then on, another
+trim happens only once RSS has dropped under the low-water mark
+(LOW_WATER of the budget) and gone over again, or SSLS_MEMORY_TRIM_COOLDOWN
+seconds (default 300) after the last one.
+"""
+import gc
+import logging
+import os
+import threading
+import time
+
+import streamlit as st
+
+from ssls.metrics import write_if_due
+
+log = logging.getLogger(__name__)
+
+BUDGET_ENV = "SSLS_MEMORY_BUDGET_MB"
+DEFAULT_BUDGET_MB = 1024
+COOLDOWN_ENV = "SSLS_MEMORY_TRIM_COOLDOWN"
+DEFAULT_COOLDOWN = 300
+# fraction of the budget RSS must fall under before an over-budget run trims again
+LOW_WATER = 0.8
+
+_clear_hooks = []
+_lock = threading.Lock()
+# armed: RSS was under the low-water mark since the last trim
+_trim = {"last": 0.0, "armed": True}
+
+
+def resident_memory_mb():
+    """Resident set size of this process in MB."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        # no procfs (macOS/Windows without psutil): peak rss is the best we have
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if peak > 2**32 else peak / 2**10
+
+
+def budget_mb():
+    return float(os.environ.get(BUDGET_ENV, DEFAULT_BUDGET_MB))
+
+
+def register_cache(clear):
+    """Add a cache clear function to run when the worker goes over budget."""
+    with _lock:
+        if clear not in _clear_hooks:
+            _clear_hooks.append(clear)
+
+
+def cooldown_seconds():
+    return float(os.environ.get(COOLDOWN_ENV, DEFAULT_COOLDOWN))
+
+
+def trim_caches():
+    """Drop everything cached in this worker and collect once."""
+    with _lock:
+        hooks = list(_clear_hooks)
+    for clear in hooks:
+        clear()
+    st.cache_data.clear()
+    gc.collect()
+
+
+def _should_trim(rss, budget):
+    now = time.monotonic()
+    with _lock:
+        if rss < budget * LOW_WATER:
+            _trim["armed"] = True
+        if rss <= budget:
+            return False
+        if not _trim["armed"] and now - _trim["last"] < cooldown_seconds():
+            return False
+        _trim["last"] = now
+        _trim["armed"] = False
+        return True
+
+
+def check_memory(page):
+    """
+    Log this worker's memory at the end of a page run, trimming caches if it
+    is over budget (at most once per excursion or cooldown, see above).
+    Returns the resident memory in MB.
+    """
+    rss = resident_memory_mb()
+    budget = budget_mb()
+
+    if _should_trim(rss, budget):
+        log.warning("%s: %.0f MB resident is over the %.0f MB budget, trimming caches",
+                    page, rss, budget)
+        trim_caches()
+        rss = resident_memory_mb()
+
+    log.info("%s: %.0f MB resident (%.0f MB budget)", page, rss, budget)
+    # end of a page run: export metrics if SSLS_METRICS_FILE is set (see ssls/metrics.py)
+    write_if_due()
+    return rss
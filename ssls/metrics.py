@@ -0,0 +1,172 @@
+"""
+Timing spans, cache counters and payload sizes for the dashboard.
+
+Hot paths (data loads, GeoJSON builds, choropleth figures, amenity counts,
+word-cloud renders, model predictions) run inside `span(name)` or a `timed`
+function, caches count their hits/misses/evictions with `incr`, and the
+largest things sent to the browser (maps, reports) add their size to a
+payload counter. Recording is a perf_counter call and a dict update under a
+lock, cheap enough to leave on.
+
+Set SSLS_METRICS_FILE (may contain {pid}, one file per worker process) to
+have the end of every page run (ssls/memory.check_memory, which every page,
+Overview included, calls last) write the totals, at most every
+SSLS_METRICS_INTERVAL seconds (default 15), as Prometheus text, e.g. for
+node_exporter's textfile collector:
+
+    ssls_span_seconds_sum{span="maps.choropleth"} 1.92
+    ssls_cache_events_total{cache="wordcloud",event="hit"} 41
+
+`take_spans()` separately hands the per-run section times to
+benchmarks/pages.py.
+"""
+import functools
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+FILE_ENV = "SSLS_METRICS_FILE"
+INTERVAL_ENV = "SSLS_METRICS_INTERVAL"
+DEFAULT_INTERVAL = 15
+
+_lock = threading.Lock()
+# (thread name, span) -> seconds since the last take_spans() (benchmarks)
+_spans = defaultdict(float)
+# since process start: span -> [count, total seconds, max seconds]
+_timings = defaultdict(lambda: [0, 0.0, 0.0])
+# (metric name, sorted label items) -> value
+_counters = defaultdict(float)
+# name -> lru_cache'd function, read at export time
+_lru_caches = {}
+_last_write = [0.0]
+
+
+def _record(name, seconds):
+    thread = threading.current_thread().name
+    with _lock:
+        _spans[thread, name] += seconds
+        timing = _timings[name]
+        timing[0] += 1
+        timing[1] += seconds
+        timing[2] = max(timing[2], seconds)
+
+
+@contextmanager
+def span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """Decorator: run the function inside span(name)."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def incr(name, value=1, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] += value
+
+
+def cache_event(cache, event, value=1):
+    """Count a hit/miss/eviction (or disk_hit, ...) of one of our caches."""
+    incr("ssls_cache_events_total", value, cache=cache, event=event)
+
+
+def payload(section, nbytes):
+    """Count bytes sent to the browser by a page section."""
+    incr("ssls_payload_bytes_total", nbytes, section=section)
+    incr("ssls_payloads_total", 1, section=section)
+
+
+def register_lru(name, func):
+    """Export the hits/misses of a functools.lru_cache'd function."""
+    _lru_caches[name] = func
+
+
+def take_spans(thread=None):
+    """
+    {span name: seconds} accumulated since the last call, only from threads
+    named `thread` if given (e.g. a page run's script thread, leaving out the
+    warm-up thread).
+    """
+    with _lock:
+        items = list(_spans.items())
+        _spans.clear()
+    spans = defaultdict(float)
+    for (thread_name, name), seconds in items:
+        if thread is None or thread_name == thread:
+            spans[name] += seconds
+    return dict(spans)
+
+
+def _labels(items):
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}"
+
+
+def _number(value):
+    return f"{value:.0f}" if float(value).is_integer() else f"{value:.6f}"
+
+
+def prometheus_text():
+    """Every metric so far in the Prometheus text exposition format."""
+    with _lock:
+        timings = {name: list(t) for name, t in _timings.items()}
+        counters = dict(_counters)
+    for name, func in _lru_caches.items():
+        info = func.cache_info()
+        counters[("ssls_cache_events_total", (("cache", name), ("event", "hit")))] = info.hits
+        counters[("ssls_cache_events_total", (("cache", name), ("event", "miss")))] = info.misses
+
+    lines = [
+        "# TYPE ssls_span_seconds summary",
+        *(f'ssls_span_seconds_count{{span="{name}"}} {count}\n'
+          f'ssls_span_seconds_sum{{span="{name}"}} {total:.6f}'
+          for name, (count, total, _) in sorted(timings.items())),
+        "# TYPE ssls_span_seconds_max gauge",
+        *(f'ssls_span_seconds_max{{span="{name}"}} {peak:.6f}'
+          for name, (_, _, peak) in sorted(timings.items())),
+    ]
+    for metric in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE {metric} counter")
+        lines.extend(f"{metric}{_labels(items)} {_number(value)}"
+                     for (name, items), value in sorted(counters.items()) if name == metric)
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path):
+    # write then rename so a scraper never reads a partial file
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(suffix=".prom", dir=directory)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
+
+
+def write_if_due():
+    """Write SSLS_METRICS_FILE if it is set and the last write is old enough."""
+    path = os.environ.get(FILE_ENV)
+    if not path:
+        return False
+    path = path.format(pid=os.getpid())
+    now = time.monotonic()
+    with _lock:
+        if now - _last_write[0] < float(os.environ.get(INTERVAL_ENV, DEFAULT_INTERVAL)):
+            return False
+        _last_write[0] = now
+    write_metrics(path)
+    return True
@@ -0,0 +1,207 @@
+"""
+Export the pickled sklearn price models into the compiled format
+(see ssls/compiled.py).
+
+Supported pipelines: an optional ColumnTransformer made of OneHotEncoder,
+StandardScaler, 'passthrough' and 'drop' parts, followed by a linear model
+(anything with coef_/intercept_), a decision tree, a random/extra-trees
+forest or gradient boosting. Anything else raises NotImplementedError rather
+than exporting something that predicts differently.
+
+Every exported model is checked against its pickle before it is written.
+
+    python -m ssls.model_export
+"""
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from ssls.compiled import SPEC_FILE, CompiledModel
+from ssls.pricing import COMPILED_DIRS, MODEL_FILES, load_pickled_models
+
+
+def _to_builtin(values):
+    # numpy scalars -> python scalars so the spec is plain json
+    return [v.item() if hasattr(v, "item") else v for v in values]
+
+
+def _column_names(columns, feature_names):
+    if isinstance(columns, str):
+        columns = [columns]
+    names = []
+    for col in columns:
+        names.append(feature_names[col] if isinstance(col, (int, np.integer)) else col)
+    return names
+
+
+def export_encoders(preprocessor, feature_names):
+    """Per input column encoding steps, in the order the estimator sees them."""
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    encoders = []
+    for _, transformer, columns in preprocessor.transformers_:
+        if transformer == "drop":
+            continue
+        names = _column_names(columns, feature_names)
+        if transformer == "passthrough":
+            encoders += [{"kind": "passthrough", "column": name} for name in names]
+        elif isinstance(transformer, OneHotEncoder):
+            if any(c is not None for c in getattr(transformer, "infrequent_categories_", [None])):
+                raise NotImplementedError("OneHotEncoder with infrequent categories")
+            drop_idx = getattr(transformer, "drop_idx_", None)
+            for i, name in enumerate(names):
+                drop = None if drop_idx is None or drop_idx[i] is None else int(drop_idx[i])
+                encoders.append({"kind": "onehot", "column": name,
+                                 "categories": _to_builtin(transformer.categories_[i]),
+                                 "drop": drop, "unknown": transformer.handle_unknown})
+        elif isinstance(transformer, StandardScaler):
+            for i, name in enumerate(names):
+                encoders.append({
+                    "kind": "scale", "column": name,
+                    "mean": None if transformer.mean_ is None else float(transformer.mean_[i]),
+                    "scale": None if transformer.scale_ is None else float(transformer.scale_[i]),
+                })
+        else:
+            raise NotImplementedError(f"cannot export {type(transformer).__name__}")
+    return encoders
+
+
+def _flatten_trees(trees):
+    """Concatenate sklearn trees into one set of node arrays."""
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        t = tree.tree_
+        roots.append(offset)
+        feature.append(t.feature)
+        threshold.append(t.threshold)
+        left.append(np.where(t.children_left == -1, -1, t.children_left + offset))
+        right.append(np.where(t.children_right == -1, -1, t.children_right + offset))
+        value.append(t.value[:, 0, 0])
+        offset += t.node_count
+    return {
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold),
+        "left": np.concatenate(left).astype(np.int32),
+        "right": np.concatenate(right).astype(np.int32),
+        "value": np.concatenate(value),
+        "roots": np.asarray(roots, dtype=np.int32),
+    }
+
+
+def export_estimator(estimator):
+    """(estimator spec, arrays) for the final step of a pipeline."""
+    from sklearn.ensemble import (ExtraTreesRegressor, GradientBoostingRegressor,
+                                  RandomForestRegressor)
+    from sklearn.tree import DecisionTreeRegressor
+
+    if hasattr(estimator, "coef_") and hasattr(estimator, "intercept_"):
+        coef = np.asarray(estimator.coef_, dtype=float).ravel()
+        intercept = float(np.ravel(estimator.intercept_)[0])
+        return {"kind": "linear", "intercept": intercept}, {"coef": coef}
+
+    if isinstance(estimator, DecisionTreeRegressor):
+        return {"kind": "trees", "average": True}, _flatten_trees([estimator])
+
+    if isinstance(estimator, (RandomForestRegressor, ExtraTreesRegressor)):
+        return {"kind": "trees", "average": True}, _flatten_trees(estimator.estimators_)
+
+    if isinstance(estimator, GradientBoostingRegressor):
+        if estimator.init_ == "zero":
+            baseline = 0.0
+        elif hasattr(estimator.init_, "constant_"):
+            baseline = float(np.ravel(estimator.init_.constant_)[0])
+        else:
+            raise NotImplementedError(f"cannot export init={type(estimator.init_).__name__}")
+        return ({"kind": "trees", "average": False, "baseline": baseline,
+                 "learning_rate": float(estimator.learning_rate)},
+                _flatten_trees(estimator.estimators_[:, 0]))
+
+    raise NotImplementedError(f"cannot export {type(estimator).__name__}")
+
+
+def export_model(pipeline):
+    """(spec, arrays) for one fitted pipeline."""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+
+    steps = pipeline.steps if isinstance(pipeline, Pipeline) else [("model", pipeline)]
+    *transforms, (_, estimator) = steps
+    columns = list(pipeline.feature_names_in_)
+
+    if not transforms:
+        encoders = [{"kind": "passthrough", "column": name} for name in columns]
+    elif len(transforms) == 1 and isinstance(transforms[0][1], ColumnTransformer):
+        encoders = export_encoders(transforms[0][1], columns)
+    else:
+        raise NotImplementedError(f"cannot export pipeline steps {[name for name, _ in transforms]}")
+
+    est_spec, arrays = export_estimator(estimator)
+    spec = {"columns": columns, "encoders": encoders,
+            "estimator": est_spec, "arrays": sorted(arrays)}
+    return spec, arrays
+
+
+def sample_inputs(spec, n_rows=256, seed=0):
+    """Synthetic rows covering every category, used to check an export."""
+    rng = np.random.default_rng(seed)
+    sample = {}
+    for enc in spec["encoders"]:
+        if enc["kind"] == "onehot":
+            cats = enc["categories"]
+            sample[enc["column"]] = [cats[i % len(cats)] for i in range(n_rows)]
+        else:
+            sample[enc["column"]] = rng.integers(0, 16, n_rows)
+    # dropped columns still have to be present in the input
+    for column in spec["columns"]:
+        sample.setdefault(column, np.zeros(n_rows, dtype=int))
+    return pd.DataFrame(sample)[spec["columns"]]
+
+
+def write_model(spec, arrays, model_dir):
+    os.makedirs(model_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(model_dir, f"{name}.npy"), np.ascontiguousarray(array))
+    with open(os.path.join(model_dir, SPEC_FILE), "w", encoding="utf-8") as f:
+        json.dump(spec, f)
+
+
+def export_zone_type(zone_type, out_dir=None):
+    """Export (and verify) every month model for a zone type."""
+    out_dir = out_dir or COMPILED_DIRS[zone_type]
+    parent = os.path.dirname(out_dir) or "."
+    os.makedirs(parent, exist_ok=True)
+
+    # written next to out_dir and swapped in whole, so the app (which uses
+    # out_dir as soon as it exists) never sees a half-written export
+    tmp_dir = tempfile.mkdtemp(dir=parent, prefix=".export-")
+    try:
+        for name, pipeline in load_pickled_models(zone_type).items():
+            spec, arrays = export_model(pipeline)
+            sample = sample_inputs(spec)
+            expected = pipeline.predict(sample)
+            got = CompiledModel(spec, arrays).predict(sample)
+            np.testing.assert_allclose(got, expected, rtol=1e-9, atol=1e-9,
+                                       err_msg=f"{zone_type} {name} export does not match the pickle")
+            write_model(spec, arrays, os.path.join(tmp_dir, name))
+        if os.path.isdir(out_dir):
+            shutil.rmtree(out_dir)
+        os.replace(tmp_dir, out_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return out_dir
+
+
+def export_missing():
+    """Export the zone types that have pickled models but no exported folder yet."""
+    return [export_zone_type(zone_type) for zone_type, (zip_filename, _, _) in MODEL_FILES.items()
+            if not os.path.isdir(COMPILED_DIRS[zone_type]) and os.path.exists(zip_filename)]
+
+
+if __name__ == "__main__":
+    for zone_type in MODEL_FILES:
+        print(f"exported {zone_type} models to {export_zone_type(zone_type)}")
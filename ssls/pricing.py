@@ -0,0 +1,185 @@
+"""
+Price suggestions for one or many listing configurations.
+
+The Price Suggestion page scores one survey at a time. `predict_batch` takes
+a whole table of configurations (any mix of zones, months, property types and
+amenities) and makes one `predict` call per distinct month model.
+
+Batch mode from the command line (csv or parquet, picked by extension):
+    python -m ssls.pricing listings.csv priced.csv --zone-type Neighborhoods
+
+The input needs columns month, zone, room_type, property_type, bedrooms and
+accommodates. Amenity columns (see AMENITIES) are optional and default to 0.
+Add --all-months to price every configuration for the whole year instead.
+"""
+import argparse
+import os
+import pickle
+import zipfile
+
+import pandas as pd
+
+from ssls.compiled import load_compiled_models
+from ssls.metrics import span
+
+# survey items (model variables)
+AMENITIES = ['air_conditioning', 'high_end_electronics', 'bbq', 'balcony', 'nature_and_views', 'bed_linen', 'breakfast', 'tv', 'coffee_machine', 'cooking_basics', 'white_goods', 'elevator', 'gym', 'child_friendly', 'parking', 'outdoor_space', 'host_greeting', 'hot_tub_sauna_or_pool', 'internet', 'long_term_stays', 'pets_allowed', 'private_entrance', 'secure', 'self_check_in', 'smoking_allowed']
+
+ROOM_TYPES = ['Entire home/apt', 'Private room', 'Hotel room', 'Shared room']
+
+PROPERTY_TYPES = ['Entire rental unit', 'Private room in rental unit', 'Entire condo', 'Private room in home', 'Entire serviced apartment', 'Entire home', 'Private room in condo', 'Private room in townhouse', 'Entire townhouse', 'Entire guest suite', 'Private room in bed and breakfast', 'Room in boutique hotel', 'Room in hotel', 'Other']
+
+# month -> fitted model (neighboring months share a model)
+MONTH_TO_MODEL = {
+    "April 2023": "model_0",
+    "May 2023": "model_1",
+    "June 2023": "model_1",
+    "July 2023": "model_2",
+    "August 2023": "model_2",
+    "September 2023": "model_4",
+    "October 2023": "model_5",
+    "November 2023": "model_6",
+    "December 2023": "model_6",
+    "January 2024": "model_9",
+    "February 2024": "model_9",
+    "March 2024": "model_9",
+}
+
+# zone_type (sidebar) -> (models zip, pickle inside it, zone column the models expect)
+MODEL_FILES = {
+    "Neighborhoods": ('inputs/models/zip_models_NBH.zip', 'models_NBH.pkl', 'census_NBH'),
+    "Census-Tracts": ('inputs/models/zip_models_tract.zip', 'models_tract.pkl', 'census_tract'),
+}
+
+# zone_type (sidebar) -> folder of exported models (python -m ssls.model_export)
+COMPILED_DIRS = {
+    "Neighborhoods": 'inputs/models/compiled_NBH',
+    "Census-Tracts": 'inputs/models/compiled_tract',
+}
+
+
+def load_pickled_models(zone_type):
+    """Dict of model name -> fitted sklearn pipeline for a zone type."""
+    zip_filename, pkl_name, _ = MODEL_FILES[zone_type]
+    with zipfile.ZipFile(zip_filename, 'r') as zip_file:
+        with zip_file.open(pkl_name) as f:
+            return pickle.load(f)
+
+
+def load_models(zone_type):
+    """
+    Dict of model name -> model for a zone type.
+
+    Uses the exported numpy models when they exist (loaded lazily one month
+    model at a time, arrays memory-mapped read-only, no sklearn needed) and
+    falls back to the pickled pipelines otherwise. The pickle holds every
+    month in one file, so the fallback always loads them all.
+    """
+    compiled_dir = COMPILED_DIRS[zone_type]
+    if os.path.isdir(compiled_dir):
+        return load_compiled_models(compiled_dir)
+    return load_pickled_models(zone_type)
+
+
+def model_columns(zone_type):
+    # the models were fit on the survey frame with its columns reversed
+    zone_col = MODEL_FILES[zone_type][2]
+    return [zone_col, 'accommodates', 'bedrooms', 'property_type', 'room_type'] + AMENITIES[::-1]
+
+
+def model_frame(configs, zone_type):
+    """Turn a table of configurations into the columns/dtypes the models take."""
+    zone_col = MODEL_FILES[zone_type][2]
+    frame = pd.DataFrame(index=configs.index)
+    frame[zone_col] = configs['zone'].astype(float if zone_col == 'census_tract' else str)
+    frame['accommodates'] = configs['accommodates'].astype(int)
+    frame['bedrooms'] = configs['bedrooms'].astype(int)
+    frame['property_type'] = configs['property_type']
+    frame['room_type'] = configs['room_type']
+    for amenity in AMENITIES:
+        if amenity in configs:
+            frame[amenity] = configs[amenity].fillna(0).astype(int)
+        else:
+            frame[amenity] = 0
+    return frame[model_columns(zone_type)]
+
+
+def predict_batch(configs, zone_type, models=None):
+    """
+    Suggested price for every row of `configs`.
+
+    Rows are grouped by the model their month maps to, so each distinct model
+    is called once on a single frame. Returns a Series aligned to `configs`.
+    """
+    if models is None:
+        models = load_models(zone_type)
+
+    unknown = set(configs['month']) - set(MONTH_TO_MODEL)
+    if unknown:
+        raise ValueError(f"no model for month(s): {sorted(unknown)}")
+
+    frame = model_frame(configs, zone_type)
+    model_names = configs['month'].map(MONTH_TO_MODEL)
+
+    prices = pd.Series(float('nan'), index=configs.index, name='price')
+    for model_name, rows in frame.groupby(model_names, sort=False):
+        with span("pricing.predict"):
+            prices.loc[rows.index] = models[model_name].predict(rows)
+    return prices
+
+
+def price_curve(config, zone_type, models=None):
+    """
+    Suggested price of one configuration for every month.
+
+    The configuration is turned into model inputs once, each distinct model
+    is called once, and its price is shared by all the months mapped to it.
+    Returns a Series indexed by month, in calendar order.
+    """
+    if models is None:
+        models = load_models(zone_type)
+
+    frame = model_frame(pd.DataFrame([config]), zone_type)
+    with span("pricing.predict"):
+        model_prices = {name: float(models[name].predict(frame)[0])
+                        for name in dict.fromkeys(MONTH_TO_MODEL.values())}
+    return pd.Series({month: model_prices[name] for month, name in MONTH_TO_MODEL.items()},
+                     name='price')
+
+
+def all_months(configs):
+    # one copy of every configuration per month (month column replaced)
+    months = pd.DataFrame({'month': list(MONTH_TO_MODEL)})
+    return configs.drop(columns='month', errors='ignore').merge(months, how='cross')
+
+
+def read_table(path):
+    return pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+
+
+def write_table(df, path):
+    if path.endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a table of listing configurations.")
+    parser.add_argument("input", help="csv or parquet of listing configurations")
+    parser.add_argument("output", help="where to write the input plus a price column")
+    parser.add_argument("--zone-type", default="Neighborhoods", choices=list(MODEL_FILES))
+    parser.add_argument("--all-months", action="store_true",
+                        help="price every configuration for every month (ignores the month column)")
+    args = parser.parse_args(argv)
+
+    configs = read_table(args.input)
+    if args.all_months:
+        configs = all_months(configs)
+    configs['price'] = predict_batch(configs, args.zone_type)
+    write_table(configs, args.output)
+    print(f"priced {len(configs)} listings -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
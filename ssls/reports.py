@@ -0,0 +1,200 @@
+"""
+Slimmed copies of the notebook HTML reports (EDA, ML discussion, spatial
+regression) shown on Overview and Spatial Regression.
+
+The nbconvert exports are 0.6-1 MB each, and most of that is not the report:
+every file inlines the full ~550 KB JupyterLab theme stylesheet, and plots
+are base64 PNGs. Each report is rewritten once:
+
+- theme CSS is cut down to the rules whose classes the report (or one of
+  its scripts) uses, keeping every rule with a pseudo-class,
+- repeated inline <style>/<script> blocks are dropped after their first use,
+- PNGs are written to static/reports/<sha1>.png (served by streamlit's
+  static file serving, see .streamlit/config.toml) and loaded lazily by the
+  browser as the iframe is scrolled.
+
+The result is kept gzipped under inputs/report_cache/ and in memory per
+process, so a rerun never touches the original file.
+
+Rebuild with:
+    python -m ssls.reports
+"""
+import base64
+import gzip
+import hashlib
+import os
+import re
+from functools import lru_cache
+
+from ssls.metrics import payload, register_lru
+
+REPORT_CACHE_DIR = "inputs/report_cache"
+STATIC_DIR = "static/reports"
+# relative to the page, which is also the base url of the srcdoc iframe
+STATIC_URL = "app/static/reports"
+
+REPORTS = [
+    "inputs/EDA_Methodology.html",
+    "inputs/ML_discussion.html",
+    "inputs/spatial_regression.html",
+]
+
+STYLE_RE = re.compile(r"<style[^>]*>(.*?)</style>", re.S)
+SCRIPT_RE = re.compile(r"<script\b[^>]*>(.*?)</script>", re.S)
+BLOCK_RE = re.compile(r"<(style|script)\b[^>]*>.*?</\1>", re.S)
+COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+CLASS_ATTR_RE = re.compile(r'class="([^"]*)"')
+CSS_CLASS_RE = re.compile(r"\.(-?[_a-zA-Z][\w-]*)")
+# a single colon: :hover, :focus, :not(...), but not ::before
+PSEUDO_CLASS_RE = re.compile(r"(?<!:):(?!:)")
+JS_STRING_RE = re.compile(r"""(["'`])((?:\\.|(?!\1).)*)\1""")
+JS_CLASS_RE = re.compile(r"-?[_a-zA-Z][\w-]*")
+PNG_RE = re.compile(r'<img src="data:image/png;base64,([A-Za-z0-9+/=\s]+)"')
+STATIC_PNG_RE = re.compile(re.escape(STATIC_URL) + r"/(\w+\.png)")
+
+
+def _css_rules(css):
+    # top-level (prelude, body) pairs; nested @media bodies are split again by the caller
+    rules = []
+    i = 0
+    while True:
+        start = css.find("{", i)
+        if start < 0:
+            return rules
+        depth, end = 1, start + 1
+        while depth and end < len(css):
+            if css[end] == "{":
+                depth += 1
+            elif css[end] == "}":
+                depth -= 1
+            end += 1
+        rules.append((css[i:start].strip(), css[start + 1:end - 1]))
+        i = end
+
+
+def _keep_selector(selector, used_classes):
+    # states (:hover, :not(...)) and classes set by the report's scripts only
+    # show up at runtime, so those selectors are always kept
+    if PSEUDO_CLASS_RE.search(selector):
+        return True
+    return all(c in used_classes for c in CSS_CLASS_RE.findall(selector))
+
+
+def prune_css(css, used_classes):
+    """Drop the selectors that name a class the document never uses."""
+    out = []
+    for prelude, body in _css_rules(COMMENT_RE.sub("", css)):
+        if prelude.startswith(("@media", "@supports")):
+            inner = prune_css(body, used_classes)
+            if inner:
+                out.append(f"{prelude}{{{inner}}}")
+        elif prelude.startswith("@"):
+            out.append(f"{prelude}{{{body.strip()}}}")
+        else:
+            selectors = [s.strip() for s in prelude.split(",") if _keep_selector(s, used_classes)]
+            if selectors:
+                out.append(f"{','.join(selectors)}{{{body.strip()}}}")
+    return "\n".join(out)
+
+
+def _dedupe_blocks(html):
+    # nbconvert repeats the same <style scoped> for every dataframe output
+    seen = set()
+
+    def keep_first(match):
+        block = match.group(0)
+        if block in seen:
+            return ""
+        seen.add(block)
+        return block
+
+    return BLOCK_RE.sub(keep_first, html)
+
+
+def _extract_pngs(html, static_dir):
+    os.makedirs(static_dir, exist_ok=True)
+
+    def to_file(match):
+        data = base64.b64decode(match.group(1))
+        name = f"{hashlib.sha1(data).hexdigest()}.png"
+        path = os.path.join(static_dir, name)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(data)
+        return f'<img loading="lazy" src="{STATIC_URL}/{name}"'
+
+    return PNG_RE.sub(to_file, html)
+
+
+def slim_report(html, static_dir=STATIC_DIR):
+    """Rewrite one nbconvert export (see module docstring)."""
+    head, sep, body = html.partition("<body")
+    body = sep + body
+
+    used_classes = set()
+    for classes in CLASS_ATTR_RE.findall(body):
+        used_classes.update(classes.split())
+    # any name in a string of an inline script may be a class it adds or queries
+    for script in SCRIPT_RE.findall(html):
+        for _, text in JS_STRING_RE.findall(script):
+            used_classes.update(JS_CLASS_RE.findall(text))
+
+    def prune_style(match):
+        css = prune_css(match.group(1), used_classes)
+        return f'<style type="text/css">\n{css}\n</style>' if css else ""
+
+    head = STYLE_RE.sub(prune_style, head)
+    body = _extract_pngs(_dedupe_blocks(body), static_dir)
+    return head + body
+
+
+def cache_path(report_path):
+    name = os.path.splitext(os.path.basename(report_path))[0]
+    return os.path.join(REPORT_CACHE_DIR, f"{name}.html.gz")
+
+
+def _is_stale(report_path, cached_path, static_dir):
+    if not os.path.exists(cached_path):
+        return True
+    if os.path.getmtime(cached_path) < os.path.getmtime(report_path):
+        return True
+    with gzip.open(cached_path, "rt", encoding="utf-8") as f:
+        images = STATIC_PNG_RE.findall(f.read())
+    return not all(os.path.exists(os.path.join(static_dir, name)) for name in images)
+
+
+def build_report(report_path, static_dir=STATIC_DIR):
+    with open(report_path, "r", encoding="utf-8") as f:
+        slim = slim_report(f.read(), static_dir)
+    path = cache_path(report_path)
+    os.makedirs(REPORT_CACHE_DIR, exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=9) as f:
+        f.write(slim)
+    return slim
+
+
+@lru_cache(maxsize=None)
+def _load_report(report_path, static_dir=STATIC_DIR):
+    path = cache_path(report_path)
+    if _is_stale(report_path, path, static_dir):
+        return build_report(report_path, static_dir)
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return f.read()
+
+
+register_lru("reports", _load_report)
+
+
+def load_report(report_path, static_dir=STATIC_DIR):
+    """Slimmed HTML for a report, from the gzipped cache (built when missing or stale)."""
+    html = _load_report(report_path, static_dir)
+    payload(f"report:{os.path.basename(report_path)}", len(html.encode("utf-8")))
+    return html
+
+
+if __name__ == "__main__":
+    for report_path in REPORTS:
+        slim = build_report(report_path)
+        print(f"{report_path}: {os.path.getsize(report_path) / 1024:.0f} KB -> "
+              f"{len(slim.encode('utf-8')) / 1024:.0f} KB "
+              f"({os.path.getsize(cache_path(report_path)) / 1024:.0f} KB gzipped)")
@@ -0,0 +1,29 @@
+"""
+Start the streamlit server with its caches warming from boot.
+
+`streamlit run` only imports a page when the first visitor opens it, so a
+warm-up started from a page puts the cold start on that visitor. This starts
+the warm-up thread (ssls/warmup.py) in the server process first and then
+runs streamlit in the same process, so the thread fills the same
+st.cache_resource caches the pages read:
+
+    python -m ssls.serve [streamlit run options, e.g. --server.port 8501]
+"""
+import sys
+
+from ssls.warmup import start_warm_up
+
+MAIN_SCRIPT = "Overview.py"
+
+
+def main(argv=None):
+    from streamlit.web import cli
+
+    argv = sys.argv[1:] if argv is None else argv
+    start_warm_up()
+    sys.argv = ["streamlit", "run", MAIN_SCRIPT, *argv]
+    return cli.main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
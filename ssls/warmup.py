@@ -0,0 +1,204 @@
+"""
+Warm-up and readiness check for the dashboard.
+
+Everything the first visitor would otherwise wait for (calendar store, stats
+cube, GeoJSON, base maps, amenity matrix, word clouds, exported price
+models, HTML reports) is built or loaded up front and each step is timed.
+
+Start the server with:
+    python -m ssls.serve [streamlit options]
+
+which starts this process's warm-up thread before streamlit takes its first
+request, so the in-memory caches the pages read (ssls/data.py) are filled at
+boot rather than on the first visitor's page run. When it finishes, the
+server process writes its status (with its pid) to inputs/warmup_status.json.
+Point the readiness probe at:
+    python -m ssls.warmup --check [--url http://localhost:8501]
+
+which exits 0 only when that status belongs to a live process whose warm-up
+succeeded (and, with --url, the streamlit server answers its health
+endpoint).
+
+`python -m ssls.warmup` on its own only builds the on-disk caches (calendar
+store, cube, parquet and report copies, exported price models), e.g. in an
+image build step; it does not mark any server ready.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import urllib.request
+
+log = logging.getLogger(__name__)
+
+STATUS_ENV = "SSLS_WARMUP_STATUS"
+DEFAULT_STATUS_PATH = "inputs/warmup_status.json"
+
+ZONE_TYPES = ["Neighborhoods", "Census-Tracts"]
+
+# this process's warm-up thread
+_state = {"thread": None}
+_lock = threading.Lock()
+
+
+def status_path():
+    return os.environ.get(STATUS_ENV, DEFAULT_STATUS_PATH)
+
+
+def _warm_models():
+    # through the page's own cached accessor, so the loaded models are the ones it uses
+    from ssls.data import load_zone_models
+    for zone_type in ZONE_TYPES:
+        models = load_zone_models(zone_type)
+        for name in models:
+            models[name]
+
+
+def _warm_word_clouds():
+    # the 'All (Boston)' clouds are what every first visit to Listings Data shows
+    import numpy as np
+
+    from ssls.amenities import amenity_counts, word_freq
+    from ssls.data import amenity_matrix, listings, word_cloud_cache
+
+    vocab, matrix = amenity_matrix()
+    prices = listings()['price'].values
+    mean_price = np.nanmean(prices)
+    cache = word_cloud_cache()
+    for zone_type in ZONE_TYPES:
+        cache.get(zone_type, "All (Boston)", 'high', word_freq(amenity_counts(vocab, matrix, prices >= mean_price)))
+        cache.get(zone_type, "All (Boston)", 'low', word_freq(amenity_counts(vocab, matrix, prices < mean_price)))
+
+
+def _warm_maps():
+    from ssls.maps import base_figure
+    for zone_type in ZONE_TYPES:
+        for hover in ("density", "listings"):
+            base_figure(zone_type, hover)
+
+
+def steps():
+    """(name, function) for every warm-up step, in dependency order."""
+    from ssls import data
+    from ssls.geometry import TOLERANCES
+    from ssls.model_export import export_missing
+    from ssls.reports import REPORTS, load_report
+
+    return [
+        ("zone tables", lambda: [data.zone_table(z) for z in ZONE_TYPES]),
+        ("census lookups", lambda: [data.census_lookup(z) for z in ZONE_TYPES]),
+        ("listings + amenity matrix", data.amenity_matrix),
+        ("calendar stats cube", data.stats_cube),
+        ("map geojson", lambda: [data.zone_geojson(z, level) for z in ZONE_TYPES for level in TOLERANCES]),
+        ("base maps", _warm_maps),
+        ("word clouds", _warm_word_clouds),
+        ("exported price models", export_missing),
+        ("price models", _warm_models),
+        ("html reports", lambda: [load_report(path) for path in REPORTS]),
+    ]
+
+
+def warm_up(write_status=True):
+    """Run every step, returning a status dict with per-step timings."""
+    status = {"ready": True, "pid": os.getpid(), "started": time.time(), "steps": []}
+    for name, step in steps():
+        start = time.perf_counter()
+        try:
+            step()
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            status["ready"] = False
+        seconds = time.perf_counter() - start
+        status["steps"].append({"name": name, "seconds": round(seconds, 3), "error": error})
+        if error:
+            log.error("warm-up %s failed after %.2fs: %s", name, seconds, error)
+        else:
+            log.info("warm-up %s took %.2fs", name, seconds)
+    status["finished"] = time.time()
+
+    if write_status:
+        path = status_path()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(status, f, indent=2)
+    return status
+
+
+def start_warm_up():
+    """Start warming this process's in-memory caches in a background thread, once."""
+    with _lock:
+        if _state["thread"] is None:
+            # a status left by an earlier server must not count for this one
+            if os.path.exists(status_path()):
+                os.remove(status_path())
+            _state["thread"] = threading.Thread(target=warm_up, name="ssls-warmup", daemon=True)
+            _state["thread"].start()
+        return _state["thread"]
+
+
+def warm_process():
+    """
+    Page-side fallback for servers started with plain `streamlit run`: starts
+    the warm-up if ssls.serve did not already (a no-op otherwise).
+    """
+    start_warm_up()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def check_server(url=None):
+    """(ready, reason) for the server process, from the status it wrote and, optionally, its health."""
+    try:
+        with open(status_path(), "r", encoding="utf-8") as f:
+            status = json.load(f)
+    except (OSError, ValueError):
+        return False, "server has not finished warming up"
+    if not status.get("pid") or not _pid_alive(status["pid"]):
+        return False, f"warm-up status is from a server that is gone (pid {status.get('pid')})"
+    if not status.get("ready"):
+        failed = [s["name"] for s in status["steps"] if s["error"]]
+        return False, f"warm-up failed: {', '.join(failed)}"
+
+    if url:
+        try:
+            with urllib.request.urlopen(url.rstrip("/") + "/_stcore/health", timeout=2) as resp:
+                if resp.status != 200:
+                    return False, f"health endpoint returned {resp.status}"
+        except OSError as e:
+            return False, f"server not answering: {e}"
+    return True, "ready"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm up the dashboard or check readiness.")
+    parser.add_argument("--check", action="store_true", help="only check the server's readiness")
+    parser.add_argument("--url", help="streamlit server to health-check with --check")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        ready, reason = check_server(args.url)
+        print(reason)
+        return 0 if ready else 1
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # builds the on-disk caches only, readiness is for the server process to report
+    status = warm_up(write_status=False)
+    total = sum(s["seconds"] for s in status["steps"])
+    print(f"warm-up {'done' if status['ready'] else 'FAILED'} in {total:.1f}s")
+    return 0 if status["ready"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
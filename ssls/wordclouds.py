@@ -0,0 +1,118 @@
+"""
+Word-cloud rendering with a bounded image cache.
+
+Laying out a 1600x800 WordCloud takes seconds of CPU, and the clouds only
+depend on the zone and the high/low price split (not the month). Rendered
+images are kept in an in-process LRU keyed by
+(zone_type, zone, split, hash of the frequencies), with an optional PNG
+directory on disk so several workers can share renders.
+
+Set SSLS_WORDCLOUD_CACHE_DIR to turn the disk tier on.
+"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from ssls.metrics import cache_event, timed
+
+MASK_PATH = "inputs/mass_outline.png"
+CACHE_DIR_ENV = "SSLS_WORDCLOUD_CACHE_DIR"
+
+
+@lru_cache(maxsize=None)
+def load_mask(mask_path=MASK_PATH):
+    # read once per process, shared (read-only) by every render
+    from PIL import Image
+    mask = np.array(Image.open(mask_path))
+    mask.setflags(write=False)
+    return mask
+
+
+@timed("wordclouds.render")
+def render_word_cloud(word_freq, mask_path=MASK_PATH):
+    from wordcloud import WordCloud
+    wc = WordCloud(background_color="white", width=1600, height=800, mask=load_mask(mask_path))
+    return wc.generate_from_frequencies(word_freq).to_image()
+
+
+def png_bytes(image):
+    # what st.image sends to the browser anyway, and much smaller to cache
+    f = io.BytesIO()
+    image.save(f, format="PNG")
+    return f.getvalue()
+
+
+def freq_hash(word_freq):
+    payload = json.dumps(sorted(word_freq.items()), separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class WordCloudCache:
+    """LRU of rendered word clouds, optionally backed by a PNG directory."""
+
+    def __init__(self, max_entries=64, disk_dir=None, mask_path=MASK_PATH):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.mask_path = mask_path
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def key(self, zone_type, zone, split, word_freq):
+        return (zone_type, str(zone), split, freq_hash(word_freq))
+
+    def _disk_path(self, key):
+        name = hashlib.sha1(json.dumps(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, f"{name}.png")
+
+    def _remember(self, key, image):
+        with self._lock:
+            self._images[key] = image
+            self._images.move_to_end(key)
+            while len(self._images) > self.max_entries:
+                self._images.popitem(last=False)
+                cache_event("wordcloud", "eviction")
+
+    def get(self, zone_type, zone, split, word_freq):
+        """The word cloud for one zone/split, rendered only on a miss."""
+        key = self.key(zone_type, zone, split, word_freq)
+        with self._lock:
+            if key in self._images:
+                self._images.move_to_end(key)
+                cache_event("wordcloud", "hit")
+                return self._images[key]
+
+        disk_path = self._disk_path(key) if self.disk_dir else None
+        if disk_path and os.path.exists(disk_path):
+            from PIL import Image
+            image = Image.open(disk_path)
+            image.load()
+            cache_event("wordcloud", "disk_hit")
+        else:
+            cache_event("wordcloud", "miss")
+            image = render_word_cloud(word_freq, self.mask_path)
+            if disk_path:
+                # write then rename so other workers never read a partial png
+                fd, tmp_path = tempfile.mkstemp(suffix=".png", dir=self.disk_dir)
+                with os.fdopen(fd, "wb") as f:
+                    image.save(f, format="PNG")
+                os.replace(tmp_path, disk_path)
+
+        self._remember(key, image)
+        return image
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+
+
+def default_cache(max_entries=64):
+    return WordCloudCache(max_entries=max_entries, disk_dir=os.environ.get(CACHE_DIR_ENV))
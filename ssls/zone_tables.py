@@ -0,0 +1,92 @@
+"""
+Typed, column-projected loading of the zone attribute tables.
+
+boston_NBH.csv and boston_tract.csv carry a WKT `geometry` column that is
+most of each file, but the maps draw the shapefiles (ssls/geometry.py) and
+the pages only read a handful of attribute columns. The first load parses
+just the ZONE_SCHEMAS columns with fixed dtypes and saves them as a small
+parquet file under inputs/zone_attributes/; later loads read that (only the
+requested columns) and never touch the polygon text.
+
+The parquet is rebuilt whenever the csv is newer (e.g. after
+`python -m ssls.zones` updates the BNB counts).
+"""
+import os
+import tempfile
+
+import pandas as pd
+
+# zone_type (sidebar) -> (attributes csv, id column)
+ZONE_TABLES = {
+    "Neighborhoods": ("inputs/boston_NBH.csv", "BlockGr202"),
+    "Census-Tracts": ("inputs/boston_tract.csv", "NAME20"),
+}
+
+# zone_type -> columns the app reads and their dtypes
+ZONE_SCHEMAS = {
+    "Neighborhoods": {
+        "BlockGr202": "str",
+        "OBJECTID": "int32",
+        "BNBs": "float64",
+        "BNBDensity": "float64",
+    },
+    "Census-Tracts": {
+        "NAME20": "float64",
+        "OBJECTID": "int32",
+        "TRACTCE20": "int64",
+        "BNBs": "float64",
+        "BNBDensity": "float64",
+    },
+}
+
+ZONE_ATTRS_DIR = "inputs/zone_attributes"
+
+
+def attrs_path(zone_type):
+    return os.path.join(ZONE_ATTRS_DIR, f"{ZONE_TABLES[zone_type][1]}.parquet")
+
+
+def build_attrs(zone_type):
+    """Parse the schema columns out of the csv and save them as parquet."""
+    csv_path, _ = ZONE_TABLES[zone_type]
+    schema = ZONE_SCHEMAS[zone_type]
+    attrs = pd.read_csv(csv_path, usecols=list(schema), dtype=schema)[list(schema)]
+    os.makedirs(ZONE_ATTRS_DIR, exist_ok=True)
+    # write then rename so another worker never reads a partial file
+    fd, tmp_path = tempfile.mkstemp(suffix=".parquet", dir=ZONE_ATTRS_DIR)
+    with os.fdopen(fd, "wb") as f:
+        attrs.to_parquet(f, index=False)
+    os.replace(tmp_path, attrs_path(zone_type))
+    return attrs
+
+
+def _is_stale(zone_type):
+    path = attrs_path(zone_type)
+    csv_path, _ = ZONE_TABLES[zone_type]
+    return not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(csv_path)
+
+
+def read_zone_table(zone_type, columns=None):
+    """
+    A zone attribute table indexed by zone name, with only `columns` (default:
+    every ZONE_SCHEMAS column).
+    """
+    _, id_col = ZONE_TABLES[zone_type]
+    if columns is None:
+        columns = [col for col in ZONE_SCHEMAS[zone_type] if col != id_col]
+    unknown = set(columns) - set(ZONE_SCHEMAS[zone_type])
+    if unknown:
+        raise KeyError(f"{zone_type} zone table has no columns {sorted(unknown)}")
+
+    if _is_stale(zone_type):
+        attrs = build_attrs(zone_type)[[id_col] + list(columns)]
+    else:
+        attrs = pd.read_parquet(attrs_path(zone_type), columns=[id_col] + list(columns))
+    return attrs.set_index(id_col)
+
+
+if __name__ == "__main__":
+    for zone_type in ZONE_TABLES:
+        attrs = build_attrs(zone_type)
+        path = attrs_path(zone_type)
+        print(f"wrote {path} ({len(attrs)} zones, {os.path.getsize(path) / 1024:.0f} KB)")
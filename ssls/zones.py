@@ -0,0 +1,185 @@
+"""
+Point-in-zone assignment of listings and the BNBs/BNBDensity columns.
+
+The census_NBH/census_tract labels in master.csv/master_short.csv and the
+BNBs/BNBDensity columns of boston_NBH.csv/boston_tract.csv used to come out
+of an offline notebook. Here each Census2020 layer is loaded once into a
+shapely STRtree, so labelling a whole Inside Airbnb scrape (~4k listings) is
+one vectorized tree query per zone type. The listing counts are then updated
+only for the zones whose count changed.
+
+Relabel a new scrape and update the zone tables with:
+    python -m ssls.zones path/to/listings.csv.gz
+"""
+import argparse
+import os
+import sys
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from ssls.calendar_store import ZONE_COLUMNS
+from ssls.geometry import ZONE_LAYERS
+from ssls.zone_tables import ZONE_TABLES
+
+# previous scrape's labels, so a reload only touches the zones that changed
+ASSIGNMENTS_CSV = "inputs/listing_zones.csv"
+
+# the only zone table columns this module writes
+BNB_COLUMNS = ['BNBs', 'BNBDensity']
+
+# the shipped BNBDensity columns are listings per km2 of World Mercator area
+# (EPSG:3395; web mercator's spherical areas are ~0.37% smaller)
+DENSITY_CRS = "EPSG:3395"
+
+
+class ZoneIndex:
+    """STRtree over one zone layer's polygons (EPSG:4326)."""
+
+    def __init__(self, zone_type):
+        import geopandas as gpd
+        import shapely
+
+        shp_path, id_col = ZONE_LAYERS[zone_type]
+        layer = gpd.read_file(shp_path)
+
+        self.zone_type = zone_type
+        self.ids = layer[id_col].astype(str).values
+        area = pd.Series(layer.to_crs(DENSITY_CRS).area.values / 1e6, index=self.ids)
+        self.area_km2 = area.groupby(level=0).sum()
+        self.geoms = np.asarray(layer.to_crs("epsg:4326").geometry.values)
+        shapely.prepare(self.geoms)
+        self.tree = shapely.STRtree(self.geoms)
+
+    def assign(self, lon, lat):
+        """Zone id for each point (None outside every zone)."""
+        import shapely
+
+        points = shapely.points(np.asarray(lon, dtype=float), np.asarray(lat, dtype=float))
+        point_idx, zone_idx = self.tree.query(points, predicate="intersects")
+        labels = np.full(len(points), None, dtype=object)
+        # a point on a shared border matches both zones, keep the first
+        first = np.unique(point_idx, return_index=True)[1]
+        labels[point_idx[first]] = self.ids[zone_idx[first]]
+        return labels
+
+
+@lru_cache(maxsize=None)
+def zone_index(zone_type):
+    return ZoneIndex(zone_type)
+
+
+def assign_zones(listings):
+    """
+    listings with census_NBH/census_tract columns from its latitude/longitude,
+    typed like master_short.csv (tracts as floats).
+    """
+    listings = listings.copy()
+    for zone_type, col in ZONE_COLUMNS.items():
+        labels = zone_index(zone_type).assign(listings['longitude'], listings['latitude'])
+        labels = pd.Series(labels, index=listings.index)
+        listings[col] = labels.astype(float) if col == 'census_tract' else labels
+    return listings
+
+
+def zone_keys(zone_type, labels):
+    # tract names come back as floats (1402.02) or shapefile strings ('1402.02')
+    if zone_type == "Census-Tracts":
+        return [f"{float(label):.2f}" for label in labels]
+    return [str(label) for label in labels]
+
+
+def zone_counts(zone_type, labels):
+    labels = pd.Series(labels).dropna()
+    return pd.Series(zone_keys(zone_type, labels), dtype=object).value_counts()
+
+
+def update_bnb_counts(zones, zone_type, before, after):
+    """
+    zones (a zone attributes table indexed by zone name) with BNBs/BNBDensity
+    updated for the zones whose listing count differs between the `before`
+    and `after` labels. Returns (zones, changed zone names).
+    """
+    delta = zone_counts(zone_type, after).sub(zone_counts(zone_type, before), fill_value=0)
+    delta = delta[delta != 0]
+
+    keys = pd.Index(zone_keys(zone_type, zones.index))
+    changed = keys.isin(delta.index)
+    if not changed.any():
+        return zones, []
+
+    area = zone_index(zone_type).area_km2
+    area = area.set_axis(zone_keys(zone_type, area.index))
+
+    zones = zones.copy()
+    bnbs = zones.loc[changed, 'BNBs'].values + delta.reindex(keys[changed]).values
+    zones.loc[changed, 'BNBs'] = bnbs
+    zones.loc[changed, 'BNBDensity'] = bnbs / area.reindex(keys[changed]).values
+    return zones, zones.index[changed].tolist()
+
+
+def read_assignments(path=ASSIGNMENTS_CSV):
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, dtype={'census_NBH': str})
+
+
+def update_zone_tables(new, assignments_path=ASSIGNMENTS_CSV):
+    """
+    Rewrite the zone tables' BNBs/BNBDensity for newly labelled listings
+    (see assign_zones). The first run (no previous labels) recounts every zone.
+    Returns {zone_type: changed zone names}.
+    """
+    old = read_assignments(assignments_path)
+
+    changed = {}
+    for zone_type, col in ZONE_COLUMNS.items():
+        # the full csv (geometry included) is rewritten, the app reads ssls.zone_tables.
+        # every cell is kept as text ('025', '+42.2495181', '1403' stay as they are),
+        # only the BNBs/BNBDensity cells of changed zones are replaced
+        csv_path, id_col = ZONE_TABLES[zone_type]
+        table = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+        counts = table.set_index(id_col)[BNB_COLUMNS].astype(float)
+        if old is None:
+            # no previous labels: expand the current counts so every zone is diffed
+            before = counts.index.repeat(counts['BNBs'].astype(int))
+        else:
+            before = old[col]
+        counts, changed[zone_type] = update_bnb_counts(counts, zone_type, before, new[col])
+        if changed[zone_type]:
+            rows = table[id_col].isin(changed[zone_type]).values
+            for column in BNB_COLUMNS:
+                # same repr as the shipped files ('17.0', '6.0057219558660275')
+                table.loc[rows, column] = [repr(float(v)) for v in counts[column].values[rows]]
+            table.to_csv(csv_path, index=False)
+
+    new[['id'] + list(ZONE_COLUMNS.values())].to_csv(assignments_path, index=False)
+    return changed
+
+
+def reload_scrape(listings_path, assignments_path=ASSIGNMENTS_CSV):
+    """Label a new Inside Airbnb listings file and update the zone tables."""
+    new = assign_zones(pd.read_csv(listings_path, usecols=['id', 'latitude', 'longitude']))
+    return new, update_zone_tables(new, assignments_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Assign listings to zones and update BNB counts.")
+    parser.add_argument("listings", help="Inside Airbnb listings.csv(.gz) with latitude/longitude")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    listings, changed = reload_scrape(args.listings)
+    seconds = time.perf_counter() - start
+
+    outside = listings['census_NBH'].isna().sum()
+    print(f"labelled {len(listings)} listings in {seconds:.2f}s ({outside} outside Boston)")
+    for zone_type, zones in changed.items():
+        print(f"{zone_type}: {len(zones)} zones updated")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())